@@ -0,0 +1,295 @@
+"""性能基准：生成可复现的合成媒体文件，在无界面模式下分阶段计时重命名流程
+
+用法：python benchmarks/benchmark.py [--sizes 1000 10000 100000] [--output benchmark.json]
+
+每个规模在单独的进程中运行，分别记录扫描、读取日期、生成计划、执行重命名四个阶段的耗时、
+每秒处理的文件数以及进程的峰值内存，写入JSON，便于比较修改前后的结果。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrop2name.engine import (METADATA_BACKENDS, NETWORK_MODES, PLAN_RENAME, RenameEngine, RenameJournal,  # noqa: E402
+                               iter_supported_files)
+from qdrop2name.metadata import MP4_EPOCH_OFFSET  # noqa: E402
+from qdrop2name.settings import DEFAULT_SETTINGS  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# 各类文件所占比例
+CORPUS_MIX = (("jpg", 40), ("mp4", 12), ("mov", 5), ("heic", 15), ("dng", 6), ("orf", 4), ("txt", 18))
+# 同一秒拍摄的文件比例（连拍），用于制造大量重名
+COLLISION_RATIO = 0.3
+FILES_PER_DIRECTORY = 500
+# 每个文件附加的数据大小（模拟图像或视频数据，解析时应被跳过）
+PAYLOAD_BYTES = 4096
+CAMERAS = (("Canon", "EOS R5"), ("NIKON CORPORATION", "NIKON Z 6"), ("Apple", "iPhone 15 Pro"), ("SONY", "ILCE-7M4"))
+
+TIFF_ASCII = 2
+TIFF_LONG = 4
+
+
+def build_ifd(entries, ifd_offset, endian):
+    """生成一个IFD及其外部数据，entries 为 [(标签, 类型, 数量, 值)]，返回IFD之后的偏移和字节"""
+    entries = sorted(entries)
+    data_offset = ifd_offset + 2 + len(entries) * 12 + 4
+    ifd = struct.pack(endian + "H", len(entries))
+    data = b""
+    for tag, typ, count, value in entries:
+        if len(value) <= 4:
+            field = value.ljust(4, b"\0")
+        else:
+            field = struct.pack(endian + "I", data_offset + len(data))
+            data += value + (b"\0" if len(value) % 2 else b"")
+        ifd += struct.pack(endian + "HHI", tag, typ, count) + field
+    ifd += struct.pack(endian + "I", 0)
+    return data_offset + len(data), ifd + data
+
+
+def build_tiff(date, camera, subsec, magic=42):
+    """生成带 Make/Model、DateTimeOriginal 和 SubSecTimeOriginal 的小端TIFF结构"""
+    endian = "<"
+    make = camera[0].encode() + b"\0"
+    model = camera[1].encode() + b"\0"
+    taken = date.strftime("%Y:%m:%d %H:%M:%S").encode() + b"\0"
+    subsec = subsec.encode() + b"\0"
+    header = b"II" + struct.pack(endian + "HI", magic, 8)
+    # 先按占位偏移生成IFD0以确定Exif IFD的位置
+    exif_offset, _ = build_ifd([(0x010F, TIFF_ASCII, len(make), make), (0x0110, TIFF_ASCII, len(model), model),
+                                (0x8769, TIFF_LONG, 1, b"\0\0\0\0")], 8, endian)
+    _, ifd0 = build_ifd([(0x010F, TIFF_ASCII, len(make), make), (0x0110, TIFF_ASCII, len(model), model),
+                         (0x8769, TIFF_LONG, 1, struct.pack(endian + "I", exif_offset))], 8, endian)
+    _, exif_ifd = build_ifd([(0x9003, TIFF_ASCII, len(taken), taken),
+                             (0x9291, TIFF_ASCII, len(subsec), subsec)], exif_offset, endian)
+    return header + ifd0 + exif_ifd
+
+
+def box(box_type, payload):
+    return struct.pack(">I", 8 + len(payload)) + box_type + payload
+
+
+def make_jpeg(date, camera, subsec, payload):
+    exif = b"Exif\0\0" + build_tiff(date, camera, subsec)
+    app1 = b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif
+    sos = b"\xff\xda" + struct.pack(">H", 8) + b"\x01\x01\x00\x00\x3f\x00"
+    return b"\xff\xd8" + app1 + sos + payload + b"\xff\xd9"
+
+
+def make_isobmff(date, payload, quicktime=False):
+    """MP4：moov在前；MOV：mdat在前、moov在文件末尾，解析时需要跳过mdat"""
+    creation_time = int(date.timestamp()) + MP4_EPOCH_OFFSET
+    mvhd = box(b"mvhd", struct.pack(">B3xIIII", 0, creation_time, creation_time, 1000, 1000) + bytes(80))
+    moov = box(b"moov", mvhd)
+    mdat = box(b"mdat", payload)
+    if quicktime:
+        return box(b"ftyp", b"qt  \0\0\0\0qt  ") + mdat + moov
+    return box(b"ftyp", b"isom\0\0\x02\0isomiso2mp41") + moov + mdat
+
+
+def make_heic(date, camera, subsec, payload):
+    """HEIC：meta/iinf 中声明Exif项目，iloc 指向 mdat 中的Exif数据"""
+    exif = struct.pack(">I", 0) + build_tiff(date, camera, subsec)
+    ftyp = box(b"ftyp", b"heic\0\0\0\0mif1heic")
+
+    def build_meta(exif_offset):
+        hdlr = box(b"hdlr", bytes(8) + b"pict" + bytes(12) + b"\0")
+        infe = box(b"infe", b"\x02\0\0\0" + struct.pack(">HH", 1, 0) + b"Exif\0")
+        iinf = box(b"iinf", bytes(4) + struct.pack(">H", 1) + infe)
+        iloc = box(b"iloc", bytes(4) + b"\x44\x00" + struct.pack(">HHHHII", 1, 1, 0, 1, exif_offset, len(exif)))
+        return box(b"meta", bytes(4) + hdlr + iinf + iloc)
+
+    exif_offset = len(ftyp) + len(build_meta(0)) + 8
+    return ftyp + build_meta(exif_offset) + box(b"mdat", exif + payload)
+
+
+def make_raw(date, camera, subsec, payload, magic):
+    return build_tiff(date, camera, subsec, magic) + payload
+
+
+def generate_corpus(root, count, seed):
+    """在 root 下生成 count 个文件，相同的 seed 总是生成相同的内容，返回总字节数"""
+    rng = random.Random(seed)
+    kinds = [kind for kind, weight in CORPUS_MIX for _ in range(weight)]
+    start = datetime(2020, 1, 1, 8, 0, 0)
+    # 连拍时间点：少量时间点被大量文件共用
+    burst_times = [start + timedelta(seconds=rng.randrange(3 * 365 * 86400)) for _ in range(max(1, count // 200))]
+    total_bytes = 0
+    for i in range(count):
+        directory = os.path.join(root, f"dir_{i // FILES_PER_DIRECTORY:04d}")
+        if i % FILES_PER_DIRECTORY == 0:
+            os.makedirs(directory, exist_ok=True)
+        kind = rng.choice(kinds)
+        if rng.random() < COLLISION_RATIO:
+            date = rng.choice(burst_times)
+        else:
+            date = start + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+        camera = rng.choice(CAMERAS)
+        subsec = f"{rng.randrange(1000):03d}"
+        payload = rng.randbytes(PAYLOAD_BYTES) if hasattr(rng, "randbytes") else os.urandom(PAYLOAD_BYTES)
+        if kind == "jpg":
+            data = make_jpeg(date, camera, subsec, payload)
+        elif kind == "mp4":
+            data = make_isobmff(date, payload)
+        elif kind == "mov":
+            data = make_isobmff(date, payload, quicktime=True)
+        elif kind == "heic":
+            data = make_heic(date, camera, subsec, payload)
+        elif kind == "dng":
+            data = make_raw(date, camera, subsec, payload, 42)
+        elif kind == "orf":
+            data = make_raw(date, camera, subsec, payload, 0x4F52)
+        else:
+            data = f"note {i}\n".encode() * 64
+        path = os.path.join(directory, f"IMG_{i:06d}.{kind}")
+        with open(path, "wb") as f:
+            f.write(data)
+        # 修改日期与拍摄日期一致，回退到修改日期时结果相同
+        os.utime(path, (date.timestamp(), date.timestamp()))
+        total_bytes += len(data)
+    return total_bytes
+
+
+def peak_rss_mb():
+    """当前进程的峰值内存（MB），无法获取时返回None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以KB为单位，macOS 以字节为单位
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def stage_result(seconds, count):
+    return {"seconds": round(seconds, 4), "files_per_sec": round(count / seconds, 1) if seconds > 0 else None}
+
+
+def run_size(count, seed, workers, backend, network, work_dir):
+    """在子进程中运行一个规模的基准，返回结果字典"""
+    root = tempfile.mkdtemp(prefix=f"corpus_{count}_", dir=work_dir)
+    try:
+        started = time.perf_counter()
+        corpus_bytes = generate_corpus(root, count, seed)
+        generate_seconds = time.perf_counter() - started
+
+        settings = dict(DEFAULT_SETTINGS, metadata_cache=False, metadata_backend=backend, network_mode=network)
+        if workers:
+            settings["metadata_workers"] = workers
+        stages = {}
+
+        # 扫描
+        started = time.perf_counter()
+        files = list(iter_supported_files([root], settings["enable_non_media"]))
+        stages["scan"] = stage_result(time.perf_counter() - started, len(files))
+
+        # 读取日期（不使用缓存，测量冷读取）
+        engine = RenameEngine(files, settings)
+        started = time.perf_counter()
+        dates = [(file_path, future.result()) for file_path, future in engine.iter_file_dates(files)]
+        stages["extract"] = stage_result(time.perf_counter() - started, len(files))
+
+        # 生成计划（使用已读取的日期，只测量模板、重名处理和排序）
+        def precomputed_dates(paths):
+            for file_path, result in dates:
+                future = Future()
+                future.set_result(result)
+                yield file_path, future
+
+        engine.iter_file_dates = precomputed_dates
+        started = time.perf_counter()
+        plan = engine.build_plan()
+        planned = plan.count(PLAN_RENAME)
+        stages["plan"] = stage_result(time.perf_counter() - started, len(files))
+
+        # 执行重命名（包括写入重命名日志）
+        engine.journal = RenameJournal(os.path.join(root, "rename_journal.log"))
+        engine.journal.open()
+        started = time.perf_counter()
+        engine.apply_plan(plan)
+        engine.journal.close()
+        stages["apply"] = stage_result(time.perf_counter() - started, planned)
+
+        total = sum(stage["seconds"] for stage in stages.values())
+        return {
+            "files": len(files),
+            "corpus_bytes": corpus_bytes,
+            "generate_seconds": round(generate_seconds, 3),
+            "renamed": engine.success_count,
+            "stages": stages,
+            "total": stage_result(total, len(files)),
+            "peak_rss_mb": peak_rss_mb(),
+            # 引擎内部各阶段的次数和耗时分布，以及各设备读取日期的吞吐量
+            "engine_stages": engine.stats.to_dict()["stages"],
+            "devices": engine.stats.to_dict()["devices"],
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Qdrop2name 性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="语料文件数")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子，相同的种子生成相同的语料")
+    parser.add_argument("--workers", type=int, help="并行读取日期的线程数（默认使用设置中的默认值）")
+    parser.add_argument("--backend", choices=METADATA_BACKENDS, default="auto", help="读取日期的方式")
+    parser.add_argument("--network", choices=NETWORK_MODES, default="auto", help="网络存储模式")
+    parser.add_argument("--work-dir", help="生成语料的目录（默认使用系统临时目录）")
+    parser.add_argument("--output", default="benchmark.json", help="结果JSON文件")
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in args.sizes:
+        # 每个规模使用新进程，峰值内存互不影响
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(run_size, count, args.seed, args.workers, args.backend, args.network,
+                                     args.work_dir).result()
+        results.append(result)
+        stages = "  ".join(f"{name} {stage['files_per_sec']}/s" for name, stage in result["stages"].items())
+        print(f"{count} 个文件: {stages}  峰值内存 {result['peak_rss_mb']} MB", file=sys.stderr)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+        "seed": args.seed,
+        "backend": args.backend,
+        "network": args.network,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Qdrop2name 的重命名引擎（不依赖Qt），图形界面（qdrop2name.gui）和命令行共用"""
@@ -0,0 +1,244 @@
+"""命令行批量模式，用法：python -m qdrop2name rename 目录 [--template ...] [--workers N]
+
+每个文件输出一行JSON，最后一行为汇总；日志和错误信息写到标准错误。不导入Qt，可在无显示环境下运行。
+"""
+
+import argparse
+import contextlib
+import json
+import signal
+import sys
+import threading
+import time
+
+from .engine import (DUPLICATE_HANDLING, METADATA_BACKENDS, NETWORK_MODES, PLAN_DONE, PLAN_ERROR, PLAN_FAILED,
+                     PLAN_RENAME, PLAN_SKIP, PLAN_UNCHANGED, RenameCheckpoint, RenameEngine, RenameJournal,
+                     iter_supported_files, undo_rename_entries)
+from .settings import SETTINGS_FILE, load_settings
+from .stats import RunStats
+from .template import NameTemplate, TemplateError, template_help
+from .watch import DEFAULT_DEBOUNCE, WatchSession
+
+# 命令行中日期来源的英文写法
+DATE_SOURCES = {"capture": "拍摄日期", "modified": "修改日期", "created": "创建日期", "now": "当前日期"}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="qdrop2name", description="按日期批量重命名照片和视频")
+    parser.add_argument("--settings", default=SETTINGS_FILE, help="设置文件（与图形界面相同的 settings.json）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rename = commands.add_parser("rename", help="重命名文件夹或文件", epilog="模板变量：\n" + template_help(),
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    rename.add_argument("paths", nargs="+", help="要重命名的文件夹或文件")
+    add_settings_arguments(rename)
+    rename.add_argument("--dry-run", action="store_true", help="只输出计划，不修改任何文件")
+    rename.add_argument("--resume", action="store_true", help="继续上次被中断的重命名")
+    rename.add_argument("--stats", metavar="FILE", help="把各阶段耗时统计和最慢的文件导出为JSON")
+
+    watch = commands.add_parser("watch", help="监视文件夹，新文件写入完成后自动重命名（Ctrl+C 停止）",
+                                epilog="模板变量：\n" + template_help(),
+                                formatter_class=argparse.RawDescriptionHelpFormatter)
+    watch.add_argument("paths", nargs="+", help="要监视的文件夹")
+    add_settings_arguments(watch)
+    watch.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                       help=f"文件最后一次变化后等待的秒数（默认{DEFAULT_DEBOUNCE:g}）")
+    watch.add_argument("--include-existing", action="store_true",
+                       help="同时重命名开始监视前文件夹（包括子文件夹）中已有的文件，默认只处理新文件")
+
+    commands.add_parser("undo", help="撤销上次重命名")
+    return parser
+
+
+def add_settings_arguments(parser):
+    """rename 和 watch 共用的、覆盖 settings.json 的参数"""
+    parser.add_argument("--template", help="命名模板，例如 {YYYY}{MM}{DD}_{HH}{mm}{SS}")
+    parser.add_argument("--workers", type=int, help="并行读取日期的线程数")
+    parser.add_argument("--backend", choices=METADATA_BACKENDS,
+                        help="读取日期的方式：auto 自动选择，thread 线程池，process 多进程（大批量RAW/HEIC）")
+    parser.add_argument("--network", choices=NETWORK_MODES,
+                        help="网络存储模式：auto 自动检测SMB/NFS挂载，on / off 手动指定")
+    parser.add_argument("--queue-depth", type=int, help="网络存储模式下同时进行的读取数（默认64）")
+    parser.add_argument("--date-source", choices=sorted(DATE_SOURCES), help="首选日期来源")
+    parser.add_argument("--fallback", choices=sorted(DATE_SOURCES), help="无法读取拍摄日期时使用的日期")
+    parser.add_argument("--on-duplicate", choices=DUPLICATE_HANDLING,
+                        help="重名时的处理方式：add_suffix 增加序号，keep_original 保留原名称，"
+                             "skip_identical / quarantine_identical 内容相同时跳过或移到隔离文件夹")
+    parser.add_argument("--no-cache", action="store_true", help="不使用拍摄日期缓存")
+
+
+def apply_arguments(settings, args):
+    """命令行参数覆盖 settings.json 中的对应设置"""
+    if args.template is not None:
+        settings["name_template"] = args.template
+    if args.workers is not None:
+        settings["metadata_workers"] = args.workers
+    if args.backend is not None:
+        settings["metadata_backend"] = args.backend
+    if args.network is not None:
+        settings["network_mode"] = args.network
+    if args.queue_depth is not None:
+        settings["network_queue_depth"] = args.queue_depth
+    if args.date_source is not None:
+        settings["date_source"] = DATE_SOURCES[args.date_source]
+    if args.fallback is not None:
+        settings["fallback_date_source"] = DATE_SOURCES[args.fallback]
+    if args.on_duplicate is not None:
+        settings["duplicate_handling"] = args.on_duplicate
+    if args.no_cache:
+        settings["metadata_cache"] = False
+    return settings
+
+
+def write_record(out, record):
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def new_counts():
+    return dict.fromkeys((PLAN_DONE, PLAN_UNCHANGED, PLAN_SKIP, PLAN_ERROR, PLAN_FAILED, PLAN_RENAME), 0)
+
+
+def progress_writer(out, counts, on_done=None):
+    """返回引擎的进度回调：每个文件输出一行JSON并计数，on_done(目标路径) 在每个文件重命名成功后调用"""
+    def on_progress(updates):
+        for row, source, status, detail in updates:
+            counts[status] += 1
+            if status == PLAN_DONE:
+                write_record(out, {"source": source, "target": detail, "status": status})
+                if on_done is not None:
+                    on_done(detail)
+            else:
+                write_record(out, {"source": source, "status": status, "reason": detail})
+        out.flush()
+    return on_progress
+
+
+def run_rename(args, settings, out):
+    started = time.monotonic()
+    cancelled = threading.Event()
+    # Ctrl+C 只请求停止，当前文件处理完后退出，进度保留以便 --resume
+    signal.signal(signal.SIGINT, lambda signum, frame: cancelled.set())
+
+    resume_plan = None
+    if args.resume:
+        resume_plan = RenameCheckpoint().load() if RenameCheckpoint().exists() else None
+        if resume_plan is None:
+            print("没有可以继续的重命名", file=sys.stderr)
+            return 1
+        files = [entry.source for entry in resume_plan]
+        scan_stats = None
+    else:
+        # 扫描之前先校验模板
+        try:
+            NameTemplate(settings["name_template"])
+        except TemplateError as e:
+            print(f"命名模板错误: {str(e)}", file=sys.stderr)
+            return 2
+        scan_stats = RunStats()
+        files = list(iter_supported_files(args.paths, settings.get("enable_non_media", False), cancelled.is_set,
+                                          scan_stats))
+
+    counts = new_counts()
+    on_progress = progress_writer(out, counts)
+
+    def on_planned(plan):
+        if not args.dry_run:
+            return
+        for entry in plan:
+            counts[entry.status] += 1
+            write_record(out, {"source": entry.source, "target": entry.target,
+                               "status": entry.status, "reason": entry.reason})
+
+    engine = RenameEngine(files, settings, dry_run=args.dry_run, resume_plan=resume_plan,
+                          on_progress=on_progress, on_planned=on_planned, is_cancelled=cancelled.is_set)
+    engine.run()
+    if args.stats:
+        if scan_stats is not None:
+            engine.stats.merge(scan_stats)
+        try:
+            engine.stats.export_json(args.stats)
+        except OSError as e:
+            print(f"导出统计失败: {str(e)}", file=sys.stderr)
+    write_record(out, {"summary": {
+        "files": len(files),
+        "renamed": counts[PLAN_DONE],
+        "planned": counts[PLAN_RENAME],
+        "unchanged": counts[PLAN_UNCHANGED],
+        "skipped": counts[PLAN_SKIP],
+        "errors": counts[PLAN_ERROR] + counts[PLAN_FAILED],
+        "cancelled": cancelled.is_set(),
+        "seconds": round(time.monotonic() - started, 3),
+    }})
+    if cancelled.is_set():
+        return 130
+    return 1 if counts[PLAN_ERROR] or counts[PLAN_FAILED] else 0
+
+
+def run_watch(args, settings, out):
+    """监视文件夹，每批写入完成的新文件运行一次重命名，直到 Ctrl+C"""
+    try:
+        NameTemplate(settings["name_template"])
+    except TemplateError as e:
+        print(f"命名模板错误: {str(e)}", file=sys.stderr)
+        return 2
+    started = time.monotonic()
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stopped.set())
+    session = WatchSession(args.paths, settings, args.debounce, include_existing=args.include_existing)
+    counts = new_counts()
+    batches = 0
+
+    def on_batch(files):
+        nonlocal batches
+        batches += 1
+        targets = []
+        engine = RenameEngine(files, settings, on_progress=progress_writer(out, counts, targets.append),
+                              is_cancelled=stopped.is_set, name_index=session.name_index,
+                              metadata_cache=session.metadata_cache)
+        engine.run()
+        session.ignore(targets)
+
+    print(f"正在监视: {', '.join(session.paths)}（Ctrl+C 停止）", file=sys.stderr)
+    try:
+        session.run(on_batch, stopped.is_set)
+    finally:
+        session.close()
+    write_record(out, {"summary": {
+        "batches": batches,
+        "renamed": counts[PLAN_DONE],
+        "unchanged": counts[PLAN_UNCHANGED],
+        "skipped": counts[PLAN_SKIP],
+        "errors": counts[PLAN_ERROR] + counts[PLAN_FAILED],
+        "seconds": round(time.monotonic() - started, 3),
+    }})
+    return 0
+
+
+def run_undo(settings, out):
+    journal = RenameJournal()
+    start, entries = journal.load_last_run()
+    if start is None:
+        print("没有可以撤销的重命名", file=sys.stderr)
+        return 1
+    RenameCheckpoint().discard()
+    restored, failed = undo_rename_entries(entries, settings.get("metadata_workers"))
+    journal.replace_last_run(start, [entry for entry, reason in failed])
+    for target, source in restored:
+        write_record(out, {"source": target, "target": source, "status": "restored"})
+    for (source, target), reason in failed:
+        write_record(out, {"source": target, "target": source, "status": PLAN_FAILED, "reason": reason})
+    write_record(out, {"summary": {"restored": len(restored), "errors": len(failed)}})
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = sys.stdout
+    # 引擎中的日志用 print 输出，转到标准错误，标准输出只保留JSON结果
+    with contextlib.redirect_stdout(sys.stderr):
+        settings = load_settings(args.settings, create=False)
+        if args.command == "undo":
+            return run_undo(settings, out)
+        if args.command == "watch":
+            return run_watch(args, apply_arguments(settings, args), out)
+        return run_rename(args, apply_arguments(settings, args), out)
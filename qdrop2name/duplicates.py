@@ -0,0 +1,89 @@
+"""内容相同的文件检测：先按大小分组，再比较首尾两块的哈希，仍相同的才读取整个文件计算哈希"""
+
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# 比较首尾时读取的块大小；不超过两块的文件首尾已覆盖全部内容，不必再计算完整哈希
+EDGE_BLOCK = 64 * 1024
+# 无法使用 mmap 时流式读取的块大小
+HASH_READ_SIZE = 1024 * 1024
+
+
+def edge_digest(path, size):
+    """文件首尾两块的哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(EDGE_BLOCK))
+        if size > EDGE_BLOCK:
+            f.seek(max(size - EDGE_BLOCK, EDGE_BLOCK))
+            digest.update(f.read(EDGE_BLOCK))
+    return digest.digest()
+
+
+def full_digest(path):
+    """整个文件的哈希，优先使用 mmap，避免逐块复制到 Python 中"""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # 直接对映射的内存计算哈希，计算期间释放GIL，多个文件可以并行
+                digest.update(mapped)
+        except (ValueError, OSError):
+            # 空文件或不支持 mmap 的文件系统
+            f.seek(0)
+            for chunk in iter(lambda: f.read(HASH_READ_SIZE), b""):
+                digest.update(chunk)
+    return digest.digest()
+
+
+def split_by(groups, key, pool):
+    """按 key(路径) 把每组进一步细分，只保留仍有两个以上文件的组；读取失败的文件不参与比较"""
+    paths = [path for group in groups for path in group]
+    results = {}
+    for path, value in zip(paths, pool.map(lambda path: safe_call(key, path), paths)):
+        if value is not None:
+            results[path] = value
+    refined = []
+    for group in groups:
+        buckets = {}
+        for path in group:
+            if path in results:
+                buckets.setdefault(results[path], []).append(path)
+        refined.extend(bucket for bucket in buckets.values() if len(bucket) > 1)
+    return refined
+
+
+def safe_call(key, path):
+    try:
+        return key(path)
+    except OSError as e:
+        print(f"读取文件内容失败: {path} ({str(e)})")
+        return None
+
+
+def find_identical_files(groups, workers=8):
+    """在每组文件中找出内容完全相同的文件，返回 [[路径, ...], ...]，每个列表保持原来的顺序。
+    只有大小相同的文件才读取内容，多数情况下不需要读取任何文件"""
+    sizes = {}
+    for group in groups:
+        for path in group:
+            try:
+                sizes[path] = os.stat(path).st_size
+            except OSError as e:
+                print(f"读取文件信息失败: {path} ({str(e)})")
+    candidates = []
+    for group in groups:
+        buckets = {}
+        for path in group:
+            if path in sizes:
+                buckets.setdefault(sizes[path], []).append(path)
+        candidates.extend(bucket for bucket in buckets.values() if len(bucket) > 1)
+    if not candidates:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        candidates = split_by(candidates, lambda path: edge_digest(path, sizes[path]), pool)
+        small = [group for group in candidates if sizes[group[0]] <= 2 * EDGE_BLOCK]
+        large = [group for group in candidates if sizes[group[0]] > 2 * EDGE_BLOCK]
+        return small + split_by(large, full_digest, pool)
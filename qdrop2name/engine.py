@@ -0,0 +1,1321 @@
+"""重命名引擎：扫描、读取日期、生成计划、处理重名和执行重命名，不依赖Qt"""
+
+import errno
+import json
+import os
+import re
+import signal
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+
+from .duplicates import find_identical_files
+from .metadata import (CAPTURE_DATE_EXTENSIONS, DEFAULT_METADATA_CACHE_MB, HEADER_READ_BUDGET, HEIF_EXTENSIONS,
+                       METADATA_CACHE_FILE, NETWORK_READ_BLOCK, RAW_EXTENSIONS, SUPPORTED_EXTENSIONS, MetadataBudgetExceeded,
+                       MetadataCache, MetadataFormatError, has_exif_signature, read_capture_date,
+                       read_exif_library_date, read_heif_library_date)
+from .stats import RunStats
+from .storage import (DEVICE_HDD, DEVICE_NETWORK, DEVICE_SSD, NetworkPathDetector, device_name,
+                      is_rotational_device)
+from .template import NameTemplate
+
+# 重命名进度合并发送到界面的间隔（秒）
+PROGRESS_INTERVAL = 0.05
+
+# 并行读取日期的线程数
+DEFAULT_METADATA_WORKERS = 8
+MAX_METADATA_WORKERS = 64
+
+# 读取日期的方式：auto 按文件数和CPU核数自动选择，thread 使用线程池，process 使用进程池
+METADATA_BACKENDS = ("auto", "thread", "process")
+# 自动模式下使用进程池的最少文件数和CPU核数，文件少时启动进程和传递结果的开销不划算
+PROCESS_POOL_MIN_FILES = 20000
+PROCESS_POOL_MIN_CPUS = 4
+# 每次发给工作进程的文件数
+PROCESS_CHUNK_SIZE = 256
+# Windows 上 ProcessPoolExecutor 最多支持61个进程
+MAX_METADATA_PROCESSES = 61
+
+# 网络存储模式（auto 自动检测，on / off 手动指定）下同时进行的读取数：每次访问都有几毫秒的往返延迟，
+# 同时发出足够多的读取才能把延迟重叠起来
+NETWORK_MODES = ("auto", "on", "off")
+DEFAULT_NETWORK_QUEUE_DEPTH = 64
+MAX_NETWORK_QUEUE_DEPTH = 256
+# 机械硬盘上同时进行的读取数，并发过多时磁头来回寻道反而更慢
+DEFAULT_ROTATIONAL_WORKERS = 2
+
+# 重名处理方式：add_suffix 增加序号后缀，keep_original 保留原名称；
+# skip_identical / quarantine_identical 与同名文件内容完全相同时跳过或移到隔离文件夹，内容不同时增加序号后缀
+DUPLICATE_HANDLING = ("add_suffix", "keep_original", "skip_identical", "quarantine_identical")
+# 隔离重复文件的文件夹，相对路径表示在文件所在目录下创建
+DEFAULT_QUARANTINE_FOLDER = "重复文件"
+
+
+class FileRegistry:
+    """按添加顺序保存文件路径，成员判断、按路径查行号、按行号取路径都是O(1)"""
+
+    def __init__(self, paths=()):
+        self.paths = []
+        self.rows = {}
+        self.extend(paths)
+
+    def add(self, path):
+        """添加文件，已存在时返回False"""
+        if path in self.rows:
+            return False
+        self.rows[path] = len(self.paths)
+        self.paths.append(path)
+        return True
+
+    def extend(self, paths):
+        """批量添加文件，返回实际新增的路径"""
+        return [path for path in paths if self.add(path)]
+
+    def row_of(self, path):
+        return self.rows.get(path)
+
+    def rename(self, row, new_path):
+        del self.rows[self.paths[row]]
+        self.paths[row] = new_path
+        self.rows[new_path] = row
+
+    def remove(self, row):
+        path = self.paths.pop(row)
+        del self.rows[path]
+        # 只需重新编号被删除行之后的文件
+        for later_row in range(row, len(self.paths)):
+            self.rows[self.paths[later_row]] = later_row
+        return path
+
+    def clear(self):
+        self.paths.clear()
+        self.rows.clear()
+
+    def copy(self):
+        return FileRegistry(self.paths)
+
+    def __contains__(self, path):
+        return path in self.rows
+
+    def __getitem__(self, row):
+        return self.paths[row]
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+
+# 重命名计划中每一项的状态
+PLAN_RENAME = "rename"        # 待重命名
+PLAN_UNCHANGED = "unchanged"  # 已符合命名格式
+PLAN_SKIP = "skip"            # 跳过
+PLAN_ERROR = "error"          # 规划阶段出错
+PLAN_DONE = "done"            # 已重命名
+PLAN_FAILED = "failed"        # 执行阶段出错
+
+
+class RenamePlanEntry:
+    """重命名计划中的一项：源路径、目标路径、状态和原因"""
+    __slots__ = ("index", "source", "target", "status", "reason")
+
+    def __init__(self, index, source, target=None, status=PLAN_RENAME, reason=""):
+        self.index = index
+        self.source = source
+        self.target = target
+        self.status = status
+        self.reason = reason
+
+
+class RenamePlan:
+    """一批文件的重命名计划，先在内存中完整生成，再统一执行"""
+
+    def __init__(self):
+        self.entries = []
+
+    def add(self, index, source, target=None, status=PLAN_RENAME, reason=""):
+        entry = RenamePlanEntry(index, source, target, status, reason)
+        self.entries.append(entry)
+        return entry
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def count(self, status):
+        return sum(1 for entry in self.entries if entry.status == status)
+
+    def schedule(self):
+        """按依赖顺序排列待执行的重命名，返回 [(计划项, 源路径, 目标路径), ...]。
+
+        目标名称被本批次另一个文件占用时，必须先移走那个文件，因此每一项最多依赖一项，
+        各项构成若干条链或环：链从末端开始执行，只有环才需要先把其中一项移到临时名称。
+        """
+        pending = [entry for entry in self.entries if entry.status == PLAN_RENAME]
+        by_source = {path_key(entry.source): entry for entry in pending}
+
+        def blocker(entry):
+            # 占用目标名称的本批次文件（只改大小写时是它自己，不算依赖）
+            other = by_source.get(path_key(entry.target))
+            return None if other is entry else other
+
+        steps = []
+        scheduled = set()
+        for entry in pending:
+            if entry.index in scheduled:
+                continue
+            path = [entry]
+            seen = {entry.index}
+            current = blocker(entry)
+            while current is not None and current.index not in scheduled and current.index not in seen:
+                path.append(current)
+                seen.add(current.index)
+                current = blocker(current)
+            if current is entry:
+                # 环：先把第一项移到临时名称，其余项倒序执行，最后从临时名称移到目标
+                temp = temp_path(entry)
+                steps.append((entry, entry.source, temp))
+                steps.extend((other, other.source, other.target) for other in reversed(path[1:]))
+                steps.append((entry, temp, entry.target))
+            else:
+                # 链：末端的目标名称已空闲，从末端开始执行
+                steps.extend((other, other.source, other.target) for other in reversed(path))
+            scheduled.update(seen)
+        return steps
+
+
+def path_key(path):
+    """比较路径用的键（Windows 下不区分大小写）"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def temp_path(entry):
+    """环中第一项使用的临时名称，由源文件名和序号确定，继续中断的重命名时能找到同一个临时文件"""
+    dir_path, name = os.path.split(entry.source)
+    return os.path.join(dir_path, f".{name}.{entry.index}.qdrop2name-tmp")
+
+
+def rename_no_replace(source, target):
+    """重命名，目标已存在时抛出 FileExistsError，而不是像 POSIX 上的 os.rename 那样直接替换。
+    计划生成后才出现在目标位置的文件不会被覆盖；只改大小写时目标就是源文件本身，照常重命名"""
+    if os.path.lexists(target) and os.path.lexists(source):
+        try:
+            same = os.path.samefile(source, target)
+        except OSError:
+            same = False
+        if not same:
+            raise FileExistsError(errno.EEXIST, "目标文件已存在", target)
+    os.rename(source, target)
+
+
+def is_suffixed_name(name, base_name, ext):
+    """文件名是否为 名称_NNN扩展名，即上次重命名时因重名加了序号"""
+    # 在重名处理中对每个文件调用，避免每次编译正则表达式
+    prefix = base_name + "_"
+    if not (name.startswith(prefix) and name.endswith(ext)):
+        return False
+    digits = name[len(prefix):len(name) - len(ext)]
+    return len(digits) >= 3 and digits.isascii() and digits.isdigit()
+
+
+class RenameCheckpoint:
+    """保存重命名计划和已完成的计划项，停止或崩溃后可以从中断处继续，无需重新读取日期"""
+
+    PLAN_FILE = "rename_checkpoint.json"
+    DONE_FILE = "rename_checkpoint.done"
+    # 每完成多少项或间隔多少秒把完成记录写入磁盘
+    FLUSH_COUNT = 100
+    FLUSH_INTERVAL = 0.5
+
+    def __init__(self, plan_path=PLAN_FILE, done_path=DONE_FILE):
+        self.plan_path = plan_path
+        self.done_path = done_path
+        self.done_file = None
+        self.unflushed = 0
+        self.last_flush_time = 0.0
+
+    def exists(self):
+        return os.path.exists(self.plan_path)
+
+    def save_plan(self, plan):
+        """写入计划（先写临时文件再替换，避免留下半个文件），并清空完成记录"""
+        data = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "entries": [[entry.index, entry.source, entry.target, entry.status, entry.reason] for entry in plan],
+        }
+        temp_path = self.plan_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.plan_path)
+        self.done_file = open(self.done_path, "w", encoding="utf-8")
+        self.last_flush_time = time.monotonic()
+
+    def mark_done(self, index):
+        self.done_file.write(f"{index}\n")
+        self.unflushed += 1
+        if self.unflushed >= self.FLUSH_COUNT or time.monotonic() - self.last_flush_time >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self.done_file is not None:
+            self.done_file.flush()
+        self.unflushed = 0
+        self.last_flush_time = time.monotonic()
+
+    def load(self):
+        """读取未完成的计划，已完成的项标记为 PLAN_DONE；没有或无法读取时返回None"""
+        try:
+            with open(self.plan_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            done = set()
+            if os.path.exists(self.done_path):
+                with open(self.done_path, "r", encoding="utf-8") as f:
+                    # 最后一行可能只写了一半
+                    done = {int(line) for line in f if line.strip().isdigit()}
+        except (OSError, ValueError) as e:
+            print(f"读取重命名进度失败: {str(e)}")
+            return None
+        plan = RenamePlan()
+        for index, source, target, status, reason in data["entries"]:
+            if status == PLAN_RENAME and index in done:
+                status = PLAN_DONE
+            plan.add(index, source, target, status, reason)
+        return plan
+
+    def close(self):
+        if self.done_file is not None:
+            self.done_file.close()
+            self.done_file = None
+
+    def discard(self):
+        self.close()
+        for path in (self.plan_path, self.done_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class RenameJournal:
+    """预写式重命名日志：每次重命名前先记录 (源路径, 目标路径) 并写入操作系统，按组 fsync，用于撤销上次重命名"""
+
+    JOURNAL_FILE = "rename_journal.log"
+    # 每记录多少项或间隔多少秒执行一次 fsync，而不是每个文件一次（每条记录仍会立即 flush）
+    GROUP_COUNT = 256
+    GROUP_INTERVAL = 0.2
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.file = None
+        self.new_run = True
+        self.created = False
+        self.written = False
+        self.pending = 0
+        self.last_commit_time = 0.0
+
+    def open(self, new_run=True):
+        """打开日志准备追加记录，new_run 为 False 时继续记录到上一次运行中（继续未完成的重命名）。
+        运行开始的标记在第一次重命名时才写入，没有改名的运行不会在日志中留下空记录，挡住之前可撤销的运行"""
+        self.new_run = new_run
+        self.created = not os.path.exists(self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.last_commit_time = time.monotonic()
+
+    def write(self, record):
+        if not self.written:
+            if self.new_run:
+                self.file.write(json.dumps({"run": datetime.now().isoformat(timespec="seconds")}) + "\n")
+            self.written = True
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # 每条记录都立即交给操作系统，进程崩溃时已执行的重命名都有记录
+        self.file.flush()
+
+    def record(self, source, target):
+        """在执行重命名之前调用。记录在改名前已写入操作系统，进程崩溃不会丢失；
+        fsync 按组进行，系统崩溃或断电时最近一组记录可能丢失"""
+        self.write([source, target])
+        self.pending += 1
+        if self.pending >= self.GROUP_COUNT or time.monotonic() - self.last_commit_time >= self.GROUP_INTERVAL:
+            self.commit()
+
+    def revoke(self, source, target):
+        """重命名失败时撤回刚记录的一项，撤销时不会把别的文件改回去"""
+        self.write({"revoke": [source, target]})
+
+    def commit(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_commit_time = time.monotonic()
+
+    def close(self):
+        if self.file is not None:
+            if self.written:
+                self.commit()
+            self.file.close()
+            self.file = None
+            if self.created and not self.written:
+                # 本次没有重命名任何文件，不留下空的日志文件
+                os.remove(self.path)
+
+    def load_last_run(self):
+        """返回 (最后一次运行在日志中的起始位置, [(源路径, 目标路径), ...])，没有记录时返回 (None, [])"""
+        if not os.path.exists(self.path):
+            return None, []
+        start, entries, offset = None, [], 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                line_start, offset = offset, offset + len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 崩溃时最后一行可能只写了一半
+                if isinstance(record, list):
+                    entries.append(tuple(record))
+                elif "run" in record:
+                    start, entries = line_start, []
+                elif "revoke" in record:
+                    revoked = tuple(record["revoke"])
+                    for i in range(len(entries) - 1, -1, -1):
+                        if entries[i] == revoked:
+                            del entries[i]
+                            break
+        return start, entries
+
+    def replace_last_run(self, start, entries):
+        """撤销后截掉最后一次运行；entries 为撤销失败、需要保留的项"""
+        if start == 0 and not entries:
+            os.remove(self.path)  # 没有更早的记录
+            return
+        with open(self.path, "r+b") as f:
+            f.truncate(start)
+        if entries:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"run": datetime.now().isoformat(timespec="seconds")}) + "\n")
+                for entry in entries:
+                    f.write(json.dumps(list(entry), ensure_ascii=False) + "\n")
+
+
+def undo_rename_entries(entries, workers=DEFAULT_METADATA_WORKERS):
+    """按相反顺序把目标文件改回源文件名。
+
+    同一目录内必须严格倒序（后面的重命名可能用了前面释放的文件名），不同目录之间并行。
+    返回 (已恢复的 [(目标路径, 源路径)], 失败的 [((源路径, 目标路径), 原因)])。
+    """
+    by_directory = {}
+    for entry in entries:
+        by_directory.setdefault(os.path.dirname(entry[0]), []).append(entry)
+
+    def undo_directory(directory_entries):
+        restored, failed = [], []
+        for source, target in reversed(directory_entries):
+            if not os.path.exists(target):
+                continue  # 重命名没有发生，或文件已被移走
+            if os.path.exists(source):
+                failed.append(((source, target), "原文件名已被占用"))
+                continue
+            try:
+                os.rename(target, source)
+                restored.append((target, source))
+            except OSError as e:
+                failed.append(((source, target), str(e)))
+        failed.reverse()
+        return restored, failed
+
+    restored, failed = [], []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(by_directory)))) as pool:
+        for directory_restored, directory_failed in pool.map(undo_directory, by_directory.values()):
+            restored.extend(directory_restored)
+            failed.extend(directory_failed)
+    return restored, failed
+
+
+class DirectoryNameIndex:
+    """每个目录只扫描一次的文件名索引，在内存中判断重名并分配序号后缀"""
+
+    def __init__(self):
+        self.names = {}        # 目录 -> 目录中（按本批次计划）存在的文件名
+        self.next_suffix = {}  # (目录, 名称, 扩展名) -> 下一个可尝试的序号
+
+    def directory_names(self, dir_path):
+        key = os.path.normcase(os.path.abspath(dir_path))
+        names = self.names.get(key)
+        if names is None:
+            names = set()
+            try:
+                with os.scandir(dir_path) as entries:
+                    names = {os.path.normcase(entry.name) for entry in entries}
+            except FileNotFoundError:
+                pass  # 目录尚未创建（例如隔离重复文件的文件夹）
+            except OSError as e:
+                print(f"目录扫描错误: {str(e)}")
+            self.names[key] = names
+        return names
+
+    def is_taken(self, dir_path, name):
+        return os.path.normcase(name) in self.directory_names(dir_path)
+
+    def claim(self, dir_path, name):
+        self.directory_names(dir_path).add(os.path.normcase(name))
+
+    def release(self, dir_path, name):
+        self.directory_names(dir_path).discard(os.path.normcase(name))
+
+    def invalidate(self, dir_path):
+        """丢弃目录的索引，下次用到时重新扫描（索引可能与磁盘不一致时调用）"""
+        key = os.path.normcase(os.path.abspath(dir_path))
+        self.names.pop(key, None)
+        for suffix_key in [suffix_key for suffix_key in self.next_suffix if suffix_key[0] == key]:
+            del self.next_suffix[suffix_key]
+
+    def allocate_suffix(self, dir_path, base_name, ext):
+        """返回第一个可用的 名称_NNN扩展名，同一名称的序号从上次分配处继续"""
+        key = (os.path.normcase(os.path.abspath(dir_path)), base_name, ext)
+        count = self.next_suffix.get(key, 1)
+        while True:
+            candidate = f"{base_name}_{count:03d}{ext}"
+            count += 1
+            if not self.is_taken(dir_path, candidate):
+                self.next_suffix[key] = count
+                return candidate
+
+
+def iter_supported_files(paths, include_all=False, is_cancelled=lambda: False, stats=None):
+    """依次返回选中的文件和文件夹中支持的文件，顺序与 os.walk 相同：先当前目录的文件，再依次进入子目录。
+    传入 stats 时按目录记录扫描耗时"""
+    for path in paths:
+        if is_cancelled():
+            return
+        if os.path.isdir(path):
+            stack = [path]
+            while stack:
+                if is_cancelled():
+                    return
+                current = stack.pop()
+                subdirs = []
+                found = []
+                started = time.perf_counter()
+                try:
+                    with os.scandir(current) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.is_dir():
+                                    # 与 os.walk 一样不进入符号链接指向的目录
+                                    if not entry.is_symlink():
+                                        subdirs.append(entry.path)
+                                elif entry.is_file() and (
+                                        include_all or os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS):
+                                    found.append(entry.path)
+                            except OSError:
+                                continue
+                except OSError as e:
+                    print(f"目录扫描错误: {str(e)}")
+                    continue
+                finally:
+                    if stats is not None:
+                        stats.record("walk", time.perf_counter() - started)
+                # 整个目录读完后再返回，扫描耗时不包括调用方处理文件的时间
+                yield from found
+                stack.extend(reversed(subdirs))
+        elif os.path.isfile(path):
+            # 直接选中的文件不按类型过滤
+            yield path
+
+
+def open_metadata_cache(settings):
+    """按设置打开拍摄日期缓存，不按拍摄日期命名或关闭缓存时返回None"""
+    if settings["date_source"] != "拍摄日期" or not settings.get("metadata_cache", True):
+        return None
+    try:
+        return MetadataCache(METADATA_CACHE_FILE, settings.get("metadata_cache_mb", DEFAULT_METADATA_CACHE_MB))
+    except sqlite3.Error as e:
+        print(f"打开日期缓存失败: {str(e)}")
+        return None
+
+
+class DeviceScheduler:
+    """按设备（st_dev）分组读取日期：每个设备有独立的线程池和并发数，互不拖累；
+    机械硬盘上按目录顺序和inode顺序读取以减少寻道。结果仍按文件原顺序返回"""
+
+    # 每段文件在段内按设备分组和排序，最多同时提交两段，内存占用与文件总数无关
+    SEGMENT_SIZE = 4096
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.settings = engine.settings
+        self.detector = NetworkPathDetector()
+        self.dir_devices = {}  # 目录 -> 设备号
+        self.devices = {}      # 设备号 -> (名称, 类型)
+        self.executors = {}    # 设备号 -> 线程池
+        self.dir_inodes = {}   # 机械硬盘上的目录 -> {文件名: inode}，只保留上一段用到的目录
+
+    def iter_file_dates(self, files):
+        """按原顺序逐个返回 (文件路径, 结果为 (日期, 相机) 的Future)"""
+        pending = deque()
+        try:
+            segment = []
+            for file_path in files:
+                segment.append(file_path)
+                if len(segment) >= self.SEGMENT_SIZE:
+                    pending.append(self.submit_segment(segment))
+                    segment = []
+                    if len(pending) >= 2:
+                        yield from self.drain(pending)
+            if segment:
+                pending.append(self.submit_segment(segment))
+            while pending:
+                yield from self.drain(pending)
+        finally:
+            for items in pending:
+                for _, future in items:
+                    future.cancel()
+            for executor in self.executors.values():
+                executor.shutdown(wait=True)
+
+    @staticmethod
+    def drain(pending):
+        """返回最早一段的结果，全部返回后才从队列中移除，中途停止时剩余的仍可被取消"""
+        items = pending[0]
+        while items:
+            yield items.popleft()
+        pending.popleft()
+
+    def submit_segment(self, segment):
+        groups = {}  # 设备号 -> [(段内位置, 文件路径)]
+        for position, file_path in enumerate(segment):
+            groups.setdefault(self.device_of(os.path.dirname(file_path)), []).append((position, file_path))
+        futures = [None] * len(segment)
+        for dev, items in groups.items():
+            name, kind = self.devices[dev]
+            if kind == DEVICE_HDD:
+                items = self.seek_order(items)
+            executor = self.executor_for(dev)
+            for position, file_path in items:
+                futures[position] = executor.submit(self.read_file_date, name, kind, file_path)
+        return deque(zip(segment, futures))
+
+    def device_of(self, dir_path):
+        """目录所在的设备号，每个目录只 stat 一次"""
+        dev = self.dir_devices.get(dir_path)
+        if dev is None:
+            try:
+                dev = os.stat(dir_path or ".").st_dev
+            except OSError:
+                dev = -1  # 读取失败时交给默认线程池，具体错误在读取文件时报告
+            self.dir_devices[dir_path] = dev
+            if dev not in self.devices:
+                self.devices[dev] = self.describe(dev, dir_path)
+        return dev
+
+    def describe(self, dev, dir_path):
+        """返回设备的 (名称, 类型)"""
+        name = device_name(dev, dir_path) if dev != -1 else "?"
+        network_mode = self.settings.get("network_mode", "auto")
+        if network_mode == "on" or (network_mode == "auto" and self.detector.is_network_path(dir_path)):
+            return name, DEVICE_NETWORK
+        if dev != -1 and is_rotational_device(dev):
+            return name, DEVICE_HDD
+        return name, DEVICE_SSD
+
+    def executor_for(self, dev):
+        executor = self.executors.get(dev)
+        if executor is None:
+            name, kind = self.devices[dev]
+            if kind == DEVICE_NETWORK:
+                workers = min(max(int(self.settings.get("network_queue_depth", DEFAULT_NETWORK_QUEUE_DEPTH)), 1),
+                              MAX_NETWORK_QUEUE_DEPTH)
+            elif kind == DEVICE_HDD:
+                workers = min(max(int(self.settings.get("rotational_workers", DEFAULT_ROTATIONAL_WORKERS)), 1),
+                              MAX_METADATA_WORKERS)
+            else:
+                workers = min(max(int(self.settings.get("metadata_workers", DEFAULT_METADATA_WORKERS)), 1),
+                              MAX_METADATA_WORKERS)
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"metadata-{name}")
+            self.executors[dev] = executor
+        return executor
+
+    def seek_order(self, items):
+        """机械硬盘上先按目录出现的顺序，同一目录内按inode顺序读取（inode顺序大致就是数据在磁盘上的顺序）。
+        文件通常按目录依次给出，一个大目录会跨越多段，目录只在第一次用到时列出一次"""
+        dir_order = {}
+        for position, file_path in items:
+            dir_order.setdefault(os.path.dirname(file_path), len(dir_order))
+        inodes = {}
+        for dir_path in dir_order:
+            inodes[dir_path] = self.dir_inodes.get(dir_path)
+            if inodes[dir_path] is None:
+                try:
+                    with os.scandir(dir_path or ".") as entries:
+                        inodes[dir_path] = {entry.name: entry.inode() for entry in entries}
+                except OSError:
+                    inodes[dir_path] = {}
+        # 不再出现的目录不再保留，内存占用只与最近一段涉及的目录有关
+        self.dir_inodes = inodes
+        return sorted(items, key=lambda item: (dir_order[os.path.dirname(item[1])],
+                                               inodes[os.path.dirname(item[1])].get(os.path.basename(item[1]), 0)))
+
+    def read_file_date(self, name, kind, file_path):
+        started = time.perf_counter()
+        try:
+            return self.engine.get_file_date(file_path)
+        finally:
+            self.engine.stats.record_device(name, kind, started, time.perf_counter())
+
+
+class RenameEngine:
+    """两阶段重命名：先在内存中生成整批计划，再按计划执行。进度和停止通过回调与调用方交互"""
+
+    def __init__(self, files, settings, dry_run=False, resume_plan=None,
+                 on_progress=None, on_planned=None, is_cancelled=None, name_index=None, metadata_cache=None):
+        self.files = FileRegistry(files)
+        self.settings = settings
+        self.dry_run = dry_run
+        self.resume_plan = resume_plan
+        # on_progress 每批收到 [(行号, 源路径, 状态, 新路径或原因), ...]
+        self.on_progress = on_progress or (lambda updates: None)
+        self.on_planned = on_planned or (lambda plan: None)
+        self.is_cancelled = is_cancelled or (lambda: False)
+        # 模板在开始前编译，无效时直接抛出 TemplateError，而不是逐个文件出错
+        self.template = NameTemplate(settings["name_template"]) if resume_plan is None else None
+        self.checkpoint = None
+        self.journal = None
+        self.success_count = 0
+        # 各阶段耗时统计，运行结束后可在统计窗口查看或导出
+        self.stats = RunStats()
+        # 监视模式下由调用方提供跨批次保留的日期缓存和目录文件名索引，不必每批重新打开和扫描
+        self.metadata_cache = metadata_cache
+        self.name_index = name_index
+        self.network_mode = False
+        self.pending_progress = []
+        self.last_progress_time = 0.0
+
+    def run(self):
+        """生成计划并执行（dry_run 时只生成计划），返回成功重命名的文件数"""
+        if self.resume_plan is not None:
+            # 继续上次未完成的计划，不再重新读取日期
+            plan = self.resume_plan
+        else:
+            owns_cache = self.metadata_cache is None
+            if owns_cache:
+                self.metadata_cache = self.open_metadata_cache()
+            try:
+                # 第一阶段：在内存中生成整批计划；第二阶段：执行计划
+                plan = self.build_plan()
+            finally:
+                if owns_cache and self.metadata_cache is not None:
+                    self.metadata_cache.close()
+                    self.metadata_cache = None
+        self.on_planned(plan)
+        # 规划阶段被停止时不执行任何重命名
+        if not self.dry_run and not self.is_cancelled():
+            self.checkpoint = RenameCheckpoint()
+            try:
+                if self.resume_plan is None:
+                    self.checkpoint.save_plan(plan)
+                else:
+                    self.checkpoint.done_file = open(self.checkpoint.done_path, "a", encoding="utf-8")
+            except OSError as e:
+                print(f"保存重命名进度失败: {str(e)}")
+                self.checkpoint = None
+            self.journal = RenameJournal()
+            try:
+                self.journal.open(new_run=self.resume_plan is None)
+            except OSError as e:
+                print(f"打开重命名日志失败: {str(e)}")
+                self.journal = None
+            try:
+                self.apply_plan(plan)
+            finally:
+                if self.journal is not None:
+                    try:
+                        self.journal.close()
+                    except OSError as e:
+                        print(f"写入重命名日志失败: {str(e)}")
+            if self.checkpoint is not None:
+                if self.is_cancelled():
+                    self.checkpoint.close()  # 保留进度，下次可以继续
+                else:
+                    self.checkpoint.discard()
+        if self.name_index is not None:
+            # 索引按计划全部执行后的状态更新过，未执行或失败的文件所在目录需要重新扫描
+            for entry in plan:
+                if entry.status in (PLAN_RENAME, PLAN_FAILED):
+                    self.name_index.invalidate(os.path.dirname(entry.source))
+        self.stats.finish()
+        return self.success_count
+
+    def build_plan(self):
+        """读取日期并为每个文件确定目标名称，不修改任何文件"""
+        plan = RenamePlan()
+        handling = self.settings.get("duplicate_handling", "add_suffix")
+        add_suffix = handling != "keep_original"
+        pending = []  # 需要改名的项: (计划项, 目录, 当前文件名, 基础名称, 扩展名)
+
+        for index, (file_path, date_result) in enumerate(self.iter_file_dates(self.files)):
+            # 每个文件之间检查是否被要求停止
+            if self.is_cancelled():
+                break
+            try:
+                # 获取日期和相机信息（读取过程中的异常在这里抛出）
+                date, camera = date_result.result()
+
+                # 生成新文件名，序号按本批次的文件顺序从1开始
+                started = time.perf_counter()
+                base_name = self.template.format(date, file_path, index + 1, camera)
+                self.stats.record("plan", time.perf_counter() - started)
+                ext = os.path.splitext(file_path)[1].lower()
+                new_name = f"{base_name}{ext}"
+                dir_path = os.path.dirname(file_path)
+                new_path = os.path.join(dir_path, new_name)
+
+                # 检查文件名是否已经是预期格式（包括上次重命名时加了序号的名称）
+                current_name = os.path.basename(file_path)
+                if current_name == new_name or (add_suffix and is_suffixed_name(current_name, base_name, ext)):
+                    plan.add(index, file_path, file_path, PLAN_UNCHANGED, "已符合命名格式")
+                    continue
+
+                # 跳过目标文件名和源文件名完全一致的情况
+                if os.path.abspath(file_path) == os.path.abspath(new_path):
+                    plan.add(index, file_path, file_path, PLAN_SKIP, "跳过: 文件名未变化")
+                    continue
+
+                pending.append((plan.add(index, file_path), dir_path, current_name, base_name, ext))
+            except Exception as e:
+                plan.add(index, file_path, None, PLAN_ERROR, f"错误: {str(e)}")
+
+        started = time.perf_counter()
+        self.resolve_targets(pending, add_suffix, handling)
+        self.stats.record("collision", time.perf_counter() - started)
+        return plan
+
+    def resolve_targets(self, pending, add_suffix, handling="add_suffix"):
+        """在整批范围内分配目标名称：本批次要改名的文件原来的名称视为空闲，
+        因此 A→B、B→C 这样的链和互换不会产生多余的序号"""
+        # 反映本批次计划执行后各目录中的文件名：移走的源名称被释放，分配的目标名称被占用
+        name_index = self.name_index if self.name_index is not None else DirectoryNameIndex()
+        for entry, dir_path, current_name, base_name, ext in pending:
+            name_index.release(dir_path, current_name)
+        if handling in ("skip_identical", "quarantine_identical"):
+            started = time.perf_counter()
+            pending = self.separate_identical(pending, name_index, handling == "quarantine_identical")
+            self.stats.record("duplicate", time.perf_counter() - started)
+
+        while True:
+            claimed = []
+            skipped = []
+            for item in pending:
+                entry, dir_path, current_name, base_name, ext = item
+                new_name = f"{base_name}{ext}"
+                if name_index.is_taken(dir_path, new_name):
+                    if not add_suffix:
+                        # 如果选择保留原名称，则跳过重命名
+                        skipped.append(item)
+                        continue
+                    # 如果选择增加序号后缀，则分配下一个可用的序号
+                    new_name = name_index.allocate_suffix(dir_path, base_name, ext)
+                name_index.claim(dir_path, new_name)
+                claimed.append((dir_path, new_name))
+                entry.target = os.path.join(dir_path, new_name)
+
+            # 被跳过的文件仍占着原来的名称；若该名称已分配给别的文件，去掉这些文件后重新分配
+            claimed_keys = {(path_key(dir_path), os.path.normcase(name)) for dir_path, name in claimed}
+            conflict = any((path_key(dir_path), os.path.normcase(current_name)) in claimed_keys
+                           for entry, dir_path, current_name, base_name, ext in skipped)
+            for entry, dir_path, current_name, base_name, ext in skipped:
+                entry.target = None
+                entry.status = PLAN_SKIP
+                entry.reason = "跳过: 文件已存在"
+            if not conflict:
+                for entry, dir_path, current_name, base_name, ext in skipped:
+                    name_index.claim(dir_path, current_name)
+                return
+            for dir_path, new_name in claimed:
+                name_index.release(dir_path, new_name)
+            for entry, dir_path, current_name, base_name, ext in skipped:
+                name_index.claim(dir_path, current_name)
+            skipped_ids = {id(item) for item in skipped}
+            pending = [item for item in pending if id(item) not in skipped_ids]
+
+    def separate_identical(self, pending, name_index, quarantine):
+        """找出与同名文件（目录中已有的或本批次中排在前面的）内容完全相同的文件，跳过或移到隔离文件夹，
+        返回仍需分配名称的项。只有目标名称重复的文件才比较内容，没有重名时不读取任何文件"""
+        groups = {}  # (目录, 基础名称, 扩展名) -> 本批次要使用该名称的项
+        for item in pending:
+            entry, dir_path, current_name, base_name, ext = item
+            groups.setdefault((path_key(dir_path), os.path.normcase(base_name), ext), []).append(item)
+        candidates = {}
+        directories = {}
+        for key, items in groups.items():
+            entry, dir_path, current_name, base_name, ext = items[0]
+            if len(items) > 1 or name_index.is_taken(dir_path, f"{base_name}{ext}"):
+                candidates[key] = items
+                directories[key[0]] = dir_path
+        if not candidates:
+            return pending
+
+        # 目录中已有的同名文件，包括上次重命名时加了序号的，按名称排列使不带序号的排在前面
+        occupants = {key: [] for key in candidates}
+        for dir_key, dir_path in directories.items():
+            for name in sorted(name_index.directory_names(dir_path)):
+                stem, ext = os.path.splitext(name)
+                key = (dir_key, stem, ext.lower())
+                if key not in occupants:
+                    key = (dir_key, re.sub(r"_\d{3,}$", "", stem), ext.lower())
+                if key in occupants:
+                    occupants[key].append(os.path.join(dir_path, name))
+
+        by_source = {}
+        groups = []
+        for key, items in candidates.items():
+            by_source.update((item[0].source, item) for item in items)
+            groups.append(occupants[key] + [item[0].source for item in items])
+        duplicates = {}  # 源路径 -> 保留的同内容文件
+        workers = self.settings.get("metadata_workers", DEFAULT_METADATA_WORKERS)
+        for identical in find_identical_files(groups, workers):
+            for path in identical[1:]:
+                if path in by_source:
+                    duplicates[path] = identical[0]
+        if not duplicates:
+            return pending
+
+        quarantine_folder = self.settings.get("quarantine_folder", DEFAULT_QUARANTINE_FOLDER)
+        remaining = []
+        for item in pending:
+            entry, dir_path, current_name, base_name, ext = item
+            original = duplicates.get(entry.source)
+            if original is None:
+                remaining.append(item)
+            elif quarantine:
+                # 移到隔离文件夹，与其中已有的文件重名时增加序号后缀
+                target_dir = os.path.join(dir_path, quarantine_folder)
+                name = current_name
+                if name_index.is_taken(target_dir, name):
+                    name = name_index.allocate_suffix(target_dir, *os.path.splitext(name))
+                name_index.claim(target_dir, name)
+                entry.target = os.path.join(target_dir, name)
+                entry.reason = f"重复文件: 与 {os.path.basename(original)} 内容相同"
+            else:
+                # 保留原来的名称
+                name_index.claim(dir_path, current_name)
+                entry.status = PLAN_SKIP
+                entry.reason = f"跳过: 与 {os.path.basename(original)} 内容相同"
+        return remaining
+
+    def apply_plan(self, plan):
+        """按依赖顺序执行重命名，并逐项报告结果"""
+        writable_dirs = {}   # 每个目录只检查一次写权限
+        failed_sources = set()  # 计划移走但实际未能移走的源路径
+
+        for entry in plan:
+            if entry.status not in (PLAN_RENAME, PLAN_DONE):
+                self.report_progress(entry)
+
+        # 正在执行的环：[第一项, 已移到目标但尚未报告完成的其余项, 环中第一个失败的原因]
+        cycle = None
+        for entry, source, target in plan.schedule():
+            # 只在两次重命名之间停止，不会打断正在进行的 os.rename；环要执行完，不留下临时文件
+            if cycle is None and self.is_cancelled():
+                break
+            if entry.status != PLAN_RENAME:
+                continue  # 环中第一项移到临时名称时已失败
+
+            reason = self.apply_step(entry, source, target, writable_dirs, failed_sources)
+            if cycle is not None and entry is cycle[0]:
+                # 环的最后一步：从临时名称移到目标；环中有一步失败时整个环恢复原名
+                first, members, error = cycle
+                cycle = None
+                if reason is None:
+                    for member in [first] + members:
+                        self.complete_entry(member)
+                else:
+                    self.rollback_cycle(first, members, error or reason, failed_sources)
+            elif reason is not None:
+                if cycle is not None and cycle[2] is None:
+                    cycle[2] = reason
+                self.fail_entry(entry, reason, failed_sources)
+            elif target != entry.target:
+                cycle = [entry, [], None]  # 环中第一项移到了临时名称
+            elif cycle is not None:
+                cycle[1].append(entry)
+            else:
+                self.complete_entry(entry)
+        self.flush_progress()
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
+
+    def apply_step(self, entry, source, target, writable_dirs, failed_sources):
+        """执行计划中的一步，成功时返回None，失败时返回原因"""
+        # 前面的重命名失败时，其源文件仍占着这个目标名称
+        if os.path.abspath(target) in failed_sources:
+            return "错误: 目标文件已存在"
+
+        breakdown = {}  # 本文件各阶段的耗时
+        # 检查文件是否可写（环中第一项从临时名称移回时已检查过）
+        if source == entry.source:
+            started = time.perf_counter()
+            reason = self.check_permission(source, writable_dirs)
+            self.stats.record("permission", time.perf_counter() - started, breakdown)
+            if reason:
+                self.stats.record_file(entry.source, breakdown)
+                return reason
+
+        # 执行重命名（先写日志再改名）
+        if self.journal is not None:
+            started = time.perf_counter()
+            try:
+                self.journal.record(source, target)
+            except OSError as e:
+                # 没有日志的重命名无法撤销，不执行这一项（记录可能已部分写入，一并撤回）
+                self.revoke_journal(source, target)
+                return f"错误: 无法写入重命名日志 - {str(e)}"
+            finally:
+                self.stats.record("journal", time.perf_counter() - started)
+        try:
+            started = time.perf_counter()
+            try:
+                self.move(entry, source, target)
+            finally:
+                self.stats.record("rename", time.perf_counter() - started, breakdown)
+                self.stats.record_file(entry.source, breakdown)
+        except FileExistsError:
+            # 计划生成后目标位置出现了别的文件（例如监视模式下刚写入的文件），不覆盖
+            self.revoke_journal(source, target)
+            return "错误: 目标文件已存在"
+        except PermissionError:
+            self.revoke_journal(source, target)
+            return "错误: 没有足够的权限"
+        except OSError as e:
+            self.revoke_journal(source, target)
+            return f"错误: {str(e)}"
+        return None
+
+    def complete_entry(self, entry):
+        entry.status = PLAN_DONE
+        if self.checkpoint is not None:
+            self.checkpoint.mark_done(entry.index)
+        self.report_progress(entry)
+        self.success_count += 1
+        # 更新文件列表中的路径
+        row = self.files.row_of(entry.source)
+        if row is not None:
+            self.files.rename(row, entry.target)
+
+    def rollback_cycle(self, first, members, reason, failed_sources):
+        """环中有一步失败时，按相反顺序把已完成的项改回原名，再把第一项从临时名称移回，不留下临时文件"""
+        restored = True
+        for member in reversed(members):
+            if restored:
+                try:
+                    rename_no_replace(member.target, member.source)
+                    self.revoke_journal(member.source, member.target)
+                    self.fail_entry(member, "错误: 同一组互换名称的文件中有文件未能重命名，已恢复原名",
+                                    failed_sources)
+                    continue
+                except OSError as e:
+                    print(f"恢复原名失败: {member.target} ({str(e)})")
+                    restored = False
+            # 一项无法改回后，更早完成的项的原名称仍被占用，保留新名称
+            self.complete_entry(member)
+        temp = temp_path(first)
+        if restored:
+            try:
+                rename_no_replace(temp, first.source)
+                self.revoke_journal(first.source, temp)
+                self.fail_entry(first, reason, failed_sources)
+                return
+            except OSError as e:
+                print(f"恢复原名失败: {temp} ({str(e)})")
+        # 原名称被占用，文件留在临时名称上，可以通过撤销恢复
+        self.fail_entry(first, f"{reason}（文件暂存为 {os.path.basename(temp)}）", failed_sources)
+
+    def check_permission(self, source, writable_dirs):
+        """检查目录是否可写、文件是否被占用，返回失败原因，可以重命名时返回None"""
+        try:
+            dir_path = os.path.dirname(source)
+            if dir_path not in writable_dirs:
+                writable_dirs[dir_path] = os.access(dir_path, os.W_OK)
+            if not writable_dirs[dir_path]:
+                return "错误: 没有写入权限"
+
+            # 临时检查文件是否被占用；不能用会创建文件的模式打开，否则源文件不存在时会留下一个空文件
+            if os.path.exists(source):
+                try:
+                    with open(source, "r+b"):
+                        pass
+                except OSError:
+                    return "错误: 文件被占用"
+            elif self.resume_plan is None:
+                return "错误: 文件不存在"
+            # 继续上次的计划时源文件可能已经移走，交给重命名时处理
+        except Exception as e:
+            return f"错误: 权限检查失败 - {str(e)}"
+        return None
+
+    def move(self, entry, source, target):
+        """执行一步重命名"""
+        try:
+            rename_no_replace(source, target)
+        except FileNotFoundError:
+            target_dir = os.path.dirname(target)
+            if not os.path.isdir(target_dir) and os.path.exists(source):
+                # 隔离重复文件的文件夹在第一次移入时创建
+                os.makedirs(target_dir, exist_ok=True)
+                rename_no_replace(source, target)
+                return
+            # 继续上次的计划时：崩溃前已完成但未记录，或环中第一项还停在临时名称上
+            if self.resume_plan is None:
+                raise
+            if not os.path.exists(target):
+                if target != entry.target or not os.path.exists(temp_path(entry)):
+                    raise
+                rename_no_replace(temp_path(entry), target)
+
+    def revoke_journal(self, source, target):
+        if self.journal is not None:
+            try:
+                self.journal.revoke(source, target)
+            except OSError as e:
+                print(f"写入重命名日志失败: {str(e)}")
+
+    def fail_entry(self, entry, reason, failed_sources):
+        entry.status = PLAN_FAILED
+        entry.reason = reason
+        failed_sources.add(os.path.abspath(entry.source))
+        self.report_progress(entry)
+
+    def report_progress(self, entry):
+        """累积进度，每隔 PROGRESS_INTERVAL 秒才向界面发送一批"""
+        detail = entry.target if entry.status == PLAN_DONE else entry.reason
+        self.pending_progress.append((entry.index, entry.source, entry.status, detail))
+        if time.monotonic() - self.last_progress_time >= PROGRESS_INTERVAL:
+            self.flush_progress()
+
+    def flush_progress(self):
+        if self.pending_progress:
+            started = time.perf_counter()
+            self.on_progress(self.pending_progress)
+            self.stats.record("progress", time.perf_counter() - started)
+            self.pending_progress = []
+        self.last_progress_time = time.monotonic()
+
+    def open_metadata_cache(self):
+        return open_metadata_cache(self.settings)
+
+    def iter_file_dates(self, files):
+        """并行读取日期，按原顺序逐个返回 (文件路径, 结果为 (日期, 相机) 的Future)"""
+        if self.settings["date_source"] == "当前日期" and not self.template.uses_camera:
+            for file_path in files:
+                future = Future()
+                future.set_result((datetime.now(), None))
+                yield file_path, future
+            return
+        self.network_mode = self.detect_network_mode(files)
+        if self.metadata_backend(files) == "process":
+            yield from self.iter_process_file_dates(files)
+            return
+
+        # 每个设备使用独立的线程池，并发数按设备类型（固态、机械硬盘、网络存储）确定
+        yield from DeviceScheduler(self).iter_file_dates(files)
+
+    def detect_network_mode(self, files):
+        """是否按网络存储读取：自动模式下只要有文件位于网络挂载上就开启"""
+        mode = self.settings.get("network_mode", "auto")
+        if mode in ("on", "off"):
+            return mode == "on"
+        return NetworkPathDetector().any_network_path(files)
+
+    def metadata_backend(self, files):
+        """选择读取日期的方式：解析元数据是纯Python计算，文件很多且CPU核数多时用进程池绕开GIL。
+        网络存储的瓶颈是往返延迟而不是CPU，自动模式下使用线程池"""
+        backend = self.settings.get("metadata_backend", "auto")
+        if backend in ("thread", "process"):
+            return backend
+        if self.network_mode:
+            return "thread"
+        needs_parsing = self.settings["date_source"] == "拍摄日期" or self.template.uses_camera
+        if (needs_parsing and len(files) >= PROCESS_POOL_MIN_FILES
+                and (os.cpu_count() or 1) >= PROCESS_POOL_MIN_CPUS):
+            return "process"
+        return "thread"
+
+    def iter_process_file_dates(self, files):
+        """在进程池中分批读取日期，按原顺序逐个返回 (文件路径, 已完成的Future)"""
+        # 只在使用进程池时才导入，不影响启动速度
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        files = list(files)
+        # 进程数不超过CPU核数和设置中的读取线程数
+        workers = min(os.cpu_count() or 1, MAX_METADATA_PROCESSES,
+                      max(int(self.settings.get("metadata_workers", DEFAULT_METADATA_WORKERS)), 1))
+        cache_path = self.metadata_cache.path if self.metadata_cache is not None else None
+        # 界面在后台线程中运行引擎，fork 带线程的进程不安全，各平台统一使用 spawn
+        context = multiprocessing.get_context("spawn")
+        window = workers * 2
+        pending = deque()
+        # 工作进程不再重复检测网络存储
+        settings = dict(self.settings, network_mode="on" if self.network_mode else "off")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_date_worker,
+                                 initargs=(settings, cache_path)) as executor:
+            try:
+                for start in range(0, len(files), PROCESS_CHUNK_SIZE):
+                    chunk = files[start:start + PROCESS_CHUNK_SIZE]
+                    pending.append((chunk, executor.submit(read_date_chunk, chunk)))
+                    if len(pending) >= window:
+                        yield from self.collect_date_chunk(*pending.popleft())
+                while pending:
+                    yield from self.collect_date_chunk(*pending.popleft())
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def collect_date_chunk(self, chunk, future):
+        """取回一批结果，合并缓存更新和耗时统计，逐个返回 (文件路径, 已完成的Future)"""
+        try:
+            results, cache_updates, stats = future.result()
+        except Exception as e:
+            # 工作进程异常退出时整批按错误处理
+            print(f"读取日期的进程出错: {str(e)}")
+            results, cache_updates, stats = [(index, None, None, str(e)) for index in range(len(chunk))], None, None
+        if cache_updates is not None and self.metadata_cache is not None:
+            self.metadata_cache.merge_updates(cache_updates)
+        if stats is not None:
+            self.stats.merge_snapshot(stats)
+        for index, date, camera, error in results:
+            result = Future()
+            if error is None:
+                result.set_result((date, camera))
+            else:
+                result.set_exception(Exception(error))
+            yield chunk[index], result
+
+    def get_file_date(self, file_path):
+        """返回 (日期, (相机厂商, 型号))，模板不使用相机信息时相机为None"""
+        breakdown = {}
+        try:
+            return self.read_file_date(file_path, breakdown)
+        finally:
+            self.stats.record_file(file_path, breakdown)
+
+    def read_file_date(self, file_path, breakdown):
+        # 检查是否为非媒体文件
+        ext = os.path.splitext(file_path)[1].lower()
+        is_media_file = ext in CAPTURE_DATE_EXTENSIONS
+        started = time.perf_counter()
+        stat = os.stat(file_path)
+        self.stats.record("stat", time.perf_counter() - started, breakdown)
+        
+        # 如果是非媒体文件且启用了非媒体文件支持
+        if not is_media_file and self.settings.get("enable_non_media", False):
+            date_source = self.settings.get("non_media_date_source", "创建日期")
+            if date_source == "创建日期":
+                return datetime.fromtimestamp(stat.st_ctime), None
+            elif date_source == "修改日期":
+                return datetime.fromtimestamp(stat.st_mtime), None
+            else:  # 当前日期
+                return datetime.now(), None
+
+        # 尝试获取首选日期；模板用到相机信息时，即使不按拍摄日期命名也要读取元数据
+        camera = None
+        if self.settings["date_source"] == "拍摄日期" or self.template.uses_camera:
+            date, camera = self.get_cached_capture_date(file_path, stat, breakdown)
+            if date and self.settings["date_source"] == "拍摄日期":
+                return date, camera
+            if self.settings["date_source"] == "当前日期":
+                return datetime.now(), camera
+
+        # 如果首选日期获取失败，使用备选日期
+        fallback_source = self.settings["fallback_date_source"]
+        
+        if fallback_source == "修改日期":
+            return datetime.fromtimestamp(stat.st_mtime), camera
+        elif fallback_source == "创建日期":
+            return datetime.fromtimestamp(stat.st_ctime), camera
+        else:  # 当前日期
+            return datetime.now(), camera
+
+    def get_cached_capture_date(self, file_path, stat, breakdown=None):
+        """先按文件身份查询缓存，未命中时才打开文件读取拍摄日期和相机信息"""
+        if self.metadata_cache is not None:
+            started = time.perf_counter()
+            hit, date, camera = self.metadata_cache.get(stat)
+            self.stats.record("cache", time.perf_counter() - started, breakdown)
+            if hit:
+                return date, camera
+        started = time.perf_counter()
+        try:
+            date, camera = self.get_capture_date(file_path)
+        except (OSError, MetadataBudgetExceeded) as e:
+            # 读取失败（文件被占用、网络中断）或超出读取量都不是确定的结果，不写入缓存，下次重新读取
+            print(f"EXIF读取错误: {str(e)}")
+            return None, None
+        finally:
+            self.stats.record("metadata", time.perf_counter() - started, breakdown)
+        if self.metadata_cache is not None:
+            self.metadata_cache.put(stat, date, camera)
+        return date, camera
+
+    def get_capture_date(self, file_path):
+        """返回 (拍摄日期, (相机厂商, 型号))，优先使用有限读取的内置解析器，无法识别的格式回退到exif库"""
+        camera = {}
+        date = self.read_capture_date(file_path, camera)
+        return date, (camera.get("make", ""), camera.get("model", ""))
+
+    def read_capture_date(self, file_path, camera):
+        budget = self.settings.get("header_read_budget", HEADER_READ_BUDGET)
+        try:
+            return read_capture_date(file_path, budget, camera, NETWORK_READ_BLOCK if self.network_mode else 0)
+        except MetadataFormatError:
+            pass
+        except (MetadataBudgetExceeded, OSError):
+            # 不是确定的结果，交给 get_cached_capture_date 处理（不写入缓存）
+            raise
+        except Exception as e:
+            print(f"EXIF读取错误: {str(e)}")
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext in HEIF_EXTENSIONS:
+            return read_heif_library_date(file_path, camera)
+        if ext in RAW_EXTENSIONS or not has_exif_signature(file_path):
+            # exif库只认识JPEG和TIFF结构且会读入整个文件，对RAW、视频和其他图片格式回退只会白白读入整个文件
+            return None
+        return read_exif_library_date(file_path, camera)
+
+
+# 进程池工作进程中只用于读取日期的引擎，由 init_date_worker 创建
+worker_engine = None
+
+
+def init_date_worker(settings, cache_path):
+    """进程池工作进程的初始化：创建引擎，只读打开日期缓存"""
+    global worker_engine
+    # Ctrl+C 会发给整个进程组，由主进程决定何时停止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 提示信息写到标准错误，不混入命令行的JSON输出
+    sys.stdout = sys.stderr
+    worker_engine = RenameEngine([], settings)
+    worker_engine.network_mode = settings["network_mode"] == "on"
+    if cache_path:
+        try:
+            worker_engine.metadata_cache = MetadataCache(cache_path, readonly=True)
+        except sqlite3.Error as e:
+            print(f"打开日期缓存失败: {str(e)}")
+
+
+def read_date_chunk(chunk):
+    """在工作进程中读取一批文件的日期，返回 ([(批内序号, 日期, 相机, 错误)], 缓存更新, 耗时统计)"""
+    results = []
+    for index, file_path in enumerate(chunk):
+        try:
+            date, camera = worker_engine.get_file_date(file_path)
+            results.append((index, date, camera, None))
+        except Exception as e:
+            results.append((index, None, None, str(e)))
+    cache = worker_engine.metadata_cache
+    stats, worker_engine.stats = worker_engine.stats, RunStats()
+    return results, cache.take_updates() if cache is not None else None, stats.snapshot()
@@ -0,0 +1,2081 @@
+"""Qdrop2name 的图形界面，由入口脚本 Qdrop2name.py 调用 main() 启动。
+入口脚本只在 __main__ 中导入本模块，多进程读取日期时子进程不会导入 PyQt6"""
+
+import sys
+import os
+import json
+import threading
+import time
+
+GUI_IMPORT_STARTED = time.perf_counter()
+
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout,
+                            QWidget, QLabel, QListWidget, QDialog, QComboBox,
+                            QRadioButton, QButtonGroup, QHBoxLayout, QFrame, QStackedLayout,
+                            QFileDialog, QLineEdit, QScrollArea, QSizePolicy, QGroupBox, QMessageBox, QStatusBar,
+                            QProgressBar, QTableView, QHeaderView, QMenu, QInputDialog,
+                            QGraphicsOpacityEffect, QCheckBox, QToolTip, QSpinBox, QPlainTextEdit, QGridLayout)
+from PyQt6.QtCore import (Qt, QThread, pyqtSignal, QSize, QPropertyAnimation, QEasingCurve, QTimer, QParallelAnimationGroup,
+                          QAbstractTableModel, QModelIndex, QObject, QEvent)
+from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QFont, QPalette, QColor, QIcon, QAction
+QT_IMPORTED = time.perf_counter()
+
+# exif 和 pillow_heif 只在内置解析器无法识别文件时才由 qdrop2name.metadata 按需导入
+from qdrop2name.engine import (PLAN_DONE, PLAN_ERROR, PLAN_FAILED, PLAN_RENAME, PLAN_SKIP, PLAN_UNCHANGED,
+                               DEFAULT_METADATA_WORKERS, DUPLICATE_HANDLING, MAX_METADATA_WORKERS, FileRegistry,
+                               RenameCheckpoint, RenameEngine, RenameJournal, iter_supported_files,
+                               undo_rename_entries)
+from qdrop2name.settings import SETTINGS_FILE, load_settings
+from qdrop2name.stats import RunStats
+from qdrop2name.template import NameTemplate, TemplateError, template_help
+from qdrop2name.watch import WatchSession
+
+ENGINE_IMPORTED = time.perf_counter()
+
+# 从启动到主窗口首次绘制的时间预算（毫秒），启动跟踪模式下超出时给出警告
+FIRST_PAINT_BUDGET_MS = 1000
+# 程序所在目录，图标文件放在这里
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 启动跟踪写入的日志文件，与 settings.json 放在同一目录（打包的程序没有控制台，看不到输出）
+STARTUP_TRACE_FILE = os.path.join(os.path.dirname(os.path.abspath(SETTINGS_FILE)), "startup_trace.log")
+
+
+class StartupTrace(QObject):
+    """启动跟踪：使用 --trace 参数或设置环境变量 QDROP2NAME_TRACE=1 时，把各启动阶段的耗时写入 startup_trace.log"""
+
+    def __init__(self, started):
+        super().__init__()
+        self.enabled = "--trace" in sys.argv or os.environ.get("QDROP2NAME_TRACE") == "1"
+        self.started = started
+        self.phases = [("导入 PyQt6", started, QT_IMPORTED),
+                       ("导入重命名引擎", QT_IMPORTED, ENGINE_IMPORTED)]
+        self.last = ENGINE_IMPORTED
+
+    def mark(self, phase):
+        """记录从上一个阶段结束到现在的耗时"""
+        if self.enabled:
+            now = time.perf_counter()
+            self.phases.append((phase, self.last, now))
+            self.last = now
+
+    def watch_first_paint(self, window):
+        if self.enabled:
+            window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            obj.removeEventFilter(self)
+            self.mark("首次绘制")
+            self.report()
+        return False
+
+    def report(self):
+        lines = [f"[启动] {phase}: {(end - start) * 1000:.1f} ms" for phase, start, end in self.phases]
+        total = (self.last - self.started) * 1000
+        lines.append(f"[启动] 到首次绘制共 {total:.1f} ms（预算 {FIRST_PAINT_BUDGET_MS} ms）")
+        if total > FIRST_PAINT_BUDGET_MS:
+            lines.append(f"[启动] 警告: 超出启动时间预算 {total - FIRST_PAINT_BUDGET_MS:.1f} ms")
+        for line in lines:
+            print(line)
+        try:
+            with open(STARTUP_TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}\n" + "\n".join(lines) + "\n\n")
+        except OSError as e:
+            print(f"写入启动跟踪日志失败: {str(e)}")
+
+
+STARTUP_TRACE = None
+
+class DropArea(QFrame):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAcceptDrops(True)
+        self.setFrameStyle(QFrame.Shape.NoFrame)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setStyleSheet("""
+            QFrame {
+                background-color: #f5f5f5;
+                border: 2px dashed #cccccc;
+                border-radius: 10px;
+            }
+            QFrame:hover {
+                background-color: #e8e8e8;
+                border: 2px dashed #999999;
+            }
+        """)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        
+        # 添加图标和提示文本
+        self.label = QLabel("拖放文件或文件夹到这里\n或点击选择文件")
+        self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label.setStyleSheet("""
+            QLabel {
+                color: #666666;
+                font-size: 16px;
+                font-weight: bold;
+                border: none;
+                padding: 20px;
+            }
+        """)
+        layout.addWidget(self.label)
+        self.setLayout(layout)
+
+    def dragEnterEvent(self, event: QDragEnterEvent):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+            self.setStyleSheet("""
+                QFrame {
+                    background-color: #e8e8e8;
+                    border: 2px dashed #666666;
+                    border-radius: 10px;
+                }
+            """)
+
+    def dragLeaveEvent(self, event):
+        self.setStyleSheet("""
+            QFrame {
+                background-color: #f5f5f5;
+                border: 2px dashed #cccccc;
+                border-radius: 10px;
+            }
+            QFrame:hover {
+                background-color: #e8e8e8;
+                border: 2px dashed #999999;
+            }
+        """)
+
+    def dropEvent(self, event: QDropEvent):
+        self.setStyleSheet("""
+            QFrame {
+                background-color: #f5f5f5;
+                border: 2px dashed #cccccc;
+                border-radius: 10px;
+            }
+            QFrame:hover {
+                background-color: #e8e8e8;
+                border: 2px dashed #999999;
+            }
+        """)
+        paths = [url.toLocalFile() for url in event.mimeData().urls()]
+        main_window = self.window()
+        if paths and isinstance(main_window, MainWindow):
+            # 文件夹在后台线程中扫描，找到的文件分批加入列表
+            main_window.scan_paths(paths)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            main_window = self.window()
+            # 扫描过程中点击用于取消扫描
+            if isinstance(main_window, MainWindow) and main_window.is_scanning():
+                main_window.cancel_scan()
+                return
+            self.open_file_dialog()
+
+    def open_file_dialog(self):
+        dialog = QFileDialog()
+        dialog.setWindowTitle("选择文件")
+        dialog.setFileMode(QFileDialog.FileMode.ExistingFiles)
+        
+        # 设置按钮文本
+        dialog.setLabelText(QFileDialog.DialogLabel.Accept, "选择")
+        dialog.setLabelText(QFileDialog.DialogLabel.Reject, "取消")
+        dialog.setLabelText(QFileDialog.DialogLabel.FileName, "文件名：")
+        dialog.setLabelText(QFileDialog.DialogLabel.FileType, "文件类型：")
+        
+        # 设置文件过滤器
+        dialog.setNameFilter(
+            "所有支持的文件 (*.jpg *.jpeg *.png *.gif *.bmp *.heic *.heif *.mp4 *.mov *.avi *.mkv *.wmv *.flv *.webm *.m4v *.3gp);;"
+            "图片文件 (*.jpg *.jpeg *.png *.gif *.bmp *.heic *.heif);;"
+            "视频文件 (*.mp4 *.mov *.avi *.mkv *.wmv *.flv *.webm *.m4v *.3gp);;"
+            "JPEG 图片 (*.jpg *.jpeg);;"
+            "PNG 图片 (*.png);;"
+            "HEIC 图片 (*.heic *.heif);;"
+            "MP4 视频 (*.mp4);;"
+            "MOV 视频 (*.mov);;"
+            "其他视频 (*.avi *.mkv *.wmv *.flv *.webm *.m4v *.3gp);;"
+            "所有文件 (*.*)"
+        )
+        
+        if dialog.exec():
+            paths = dialog.selectedFiles()
+            main_window = self.window()
+            if paths and isinstance(main_window, MainWindow):
+                main_window.scan_paths(paths)
+
+    def show_success(self, count):
+        """显示成功提示"""
+        self.label.setText(f"✓ 已重命名 {count} 个文件")
+        self.label.setStyleSheet("""
+            QLabel {
+                color: #4CAF50;
+                font-size: 16px;
+                font-weight: bold;
+                border: none;
+                padding: 20px;
+            }
+        """)
+        # 3秒后恢复原始文本
+        QTimer.singleShot(3000, self.reset_label)
+
+    def reset_label(self):
+        """恢复原始文本"""
+        self.label.setText("拖放文件或文件夹到这里\n或点击选择文件")
+        self.label.setStyleSheet("""
+            QLabel {
+                color: #666666;
+                font-size: 16px;
+                font-weight: bold;
+                border: none;
+                padding: 20px;
+            }
+        """)
+
+class AnimatedButton(QPushButton):
+    def __init__(self, text, parent=None):
+        super().__init__(text, parent)
+        self.opacity_effect = QGraphicsOpacityEffect(self)
+        self.setGraphicsEffect(self.opacity_effect)
+        self.opacity_effect.setOpacity(1.0)
+        
+        # 创建动画组
+        self.animation_group = QParallelAnimationGroup()
+        
+        # 创建位置动画
+        self.position_animation = QPropertyAnimation(self, b"geometry")
+        self.position_animation.setDuration(150)
+        self.position_animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+        
+        # 创建透明度动画
+        self.opacity_animation = QPropertyAnimation(self.opacity_effect, b"opacity")
+        self.opacity_animation.setDuration(200)
+        self.opacity_animation.setEasingCurve(QEasingCurve.Type.InOutCubic)
+        
+        # 将动画添加到动画组
+        self.animation_group.addAnimation(self.position_animation)
+        self.animation_group.addAnimation(self.opacity_animation)
+        
+        # 设置初始状态
+        self.is_hovered = False
+
+    def enterEvent(self, event):
+        if not self.is_hovered:
+            self.is_hovered = True
+            # 设置位置动画
+            current_geometry = self.geometry()
+            self.position_animation.setStartValue(current_geometry)
+            self.position_animation.setEndValue(current_geometry.adjusted(0, -2, 0, -2))
+            
+            # 设置透明度动画
+            self.opacity_animation.setStartValue(1.0)
+            self.opacity_animation.setEndValue(0.8)
+            
+            # 启动动画组
+            self.animation_group.start()
+
+    def leaveEvent(self, event):
+        if self.is_hovered:
+            self.is_hovered = False
+            # 设置位置动画
+            current_geometry = self.geometry()
+            self.position_animation.setStartValue(current_geometry)
+            self.position_animation.setEndValue(current_geometry.adjusted(0, 2, 0, 2))
+            
+            # 设置透明度动画
+            self.opacity_animation.setStartValue(0.8)
+            self.opacity_animation.setEndValue(1.0)
+            
+            # 启动动画组
+            self.animation_group.start()
+
+# 新建设置面板
+class SettingsPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.settings = self.load_settings()  # 初始化settings属性
+        self.setStyleSheet("""
+            QWidget {
+                background-color: white;
+            }
+            QLabel {
+                color: #333333;
+                font-size: 13px;
+            }
+            QComboBox {
+                color: #333333;
+                font-size: 13px;
+                padding: 6px 12px;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                background: white;
+                min-width: 250px;
+                min-height: 32px;
+            }
+            QComboBox:hover {
+                border-color: #999999;
+            }
+            QComboBox:focus {
+                border-color: #999999;
+            }
+            QComboBox::drop-down {
+                border: none;
+                width: 20px;
+            }
+            QComboBox::down-arrow {
+                image: none;
+                border: none;
+                width: 0;
+                height: 0;
+                border-left: 4px solid transparent;
+                border-right: 4px solid transparent;
+                border-top: 4px solid #999999;
+                margin-right: 8px;
+            }
+            QComboBox QAbstractItemView {
+                border: 1px solid #e0e0e0;
+                background: white;
+                selection-background-color: #f5f5f5;
+                selection-color: #333333;
+            }
+            QComboBox QAbstractItemView::item {
+                padding: 8px;
+                min-height: 28px;
+            }
+            QRadioButton {
+                color: #333333;
+                font-size: 13px;
+                padding: 8px 0;
+                spacing: 8px;
+                min-height: 32px;
+            }
+            QRadioButton::indicator {
+                width: 18px;
+                height: 18px;
+                border: 1px solid #e0e0e0;
+                border-radius: 9px;
+            }
+            QRadioButton::indicator:hover {
+                border-color: #999999;
+            }
+            QRadioButton::indicator:checked {
+                background-color: #999999;
+                border-color: #999999;
+            }
+            QPushButton {
+                background-color: #007AFF;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 6px;
+                font-size: 14px;
+                min-width: 80px;
+            }
+            QPushButton:hover {
+                background-color: #0056b3;
+            }
+            QPushButton:pressed {
+                background-color: #004494;
+            }
+            QLineEdit {
+                padding: 6px 12px;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                font-size: 13px;
+                background: white;
+                min-height: 32px;
+            }
+            QLineEdit:hover {
+                border-color: #999999;
+            }
+            QLineEdit:focus {
+                border-color: #999999;
+            }
+            QGroupBox {
+                border: 1px solid #e0e0e0;
+                border-radius: 8px;
+                margin-top: 7px;
+                padding: 7px;
+                font-weight: bold;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+                color: #333333;
+            }
+        """)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setSpacing(24)  # 增加组之间的间距
+        layout.setContentsMargins(30, 30, 30, 30)
+
+        # 命名模板组
+        template_group = QGroupBox("命名模板")
+        template_layout = QVBoxLayout()
+        template_layout.setSpacing(16)  # 增加元素之间的间距
+        template_layout.setContentsMargins(16, 20, 16, 16)  # 调整内边距
+        
+        # 模板输入区域
+        template_input_layout = QHBoxLayout()
+        template_input_layout.setSpacing(12)  # 调整水平间距
+        
+        # 自定义格式输入
+        self.custom_format_label = QLabel("命名模板")
+        self.custom_format_label.setStyleSheet("color: #666666; font-size: 13px;")
+        self.custom_format_label.setFixedWidth(80)  # 固定标签宽度
+        template_input_layout.addWidget(self.custom_format_label)
+        
+        self.custom_format = QLineEdit()
+        self.custom_format.setPlaceholderText("可用变量：{YYYY}年 {MM}月 {DD}日 {HH}时 {mm}分 {SS}秒 {SEQ}序号 {NAME}原文件名")
+        self.custom_format.setStyleSheet("""
+            QLineEdit {
+                padding: 8px 12px;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                background: white;
+                font-size: 13px;
+                min-width: 300px;
+                height: 32px;
+            }
+            QLineEdit:hover {
+                border-color: #999999;
+            }
+            QLineEdit:focus {
+                border-color: #2196F3;
+            }
+        """)
+        template_input_layout.addWidget(self.custom_format)
+        
+        # 添加帮助按钮
+        help_btn = QPushButton("💡")
+        help_btn.setFixedSize(32, 32)
+        help_text = f"""
+命名模板说明：
+
+可用变量：
+{template_help()}
+
+示例：
+{{YYYY}}{{MM}}{{DD}}_{{HH}}{{mm}}{{SS}} → 20250415_122809.jpg
+IMG-{{YYYY}}{{MM}}{{DD}}_{{HH}}{{mm}}{{SS}} → IMGS-20250415_122809.jpg
+Photo_{{YYYY}}-{{MM}}-{{DD}} → Photo_2025-04-15.jpg
+{{YYYY}}{{MM}}{{DD}}_{{MODEL}}_{{SEQ:4}} → 20250415_iPhone 15_0001.jpg
+
+注意：
+- 变量必须用花括号 {{}} 包裹
+- 其他文本将保持原样
+- 例如：MyPhoto_{{YYYY}} → MyPhoto_2025.jpg
+        """
+        help_btn.setToolTip(help_text)
+        help_btn.setStyleSheet("""
+            QPushButton {
+                background: #ffffff;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                color: #666666;
+                font-size: 16px;
+                font-weight: normal;
+                padding: 0px;
+                font-family: "Segoe UI Emoji", "Apple Color Emoji", "Noto Color Emoji", "Microsoft YaHei", sans-serif;
+                min-width: 32px;
+                max-width: 32px;
+            }
+            QPushButton:hover {
+                background: #f5f5f5;
+                color: #FFC107;
+                border-color: #FFC107;
+            }
+            QToolTip {
+                background-color: #333333;
+                color: white;
+                border: none;
+                padding: 8px 12px;
+                border-radius: 4px;
+                font-size: 12px;
+                font-family: "Microsoft YaHei", "Segoe UI", sans-serif;
+                max-width: 400px;
+            }
+        """)
+        
+        # 添加点击事件处理
+        def show_help():
+            QToolTip.showText(help_btn.mapToGlobal(help_btn.rect().bottomRight()), help_text, help_btn)
+        
+        help_btn.clicked.connect(show_help)
+        template_input_layout.addWidget(help_btn)
+        template_input_layout.addStretch()
+        
+        template_layout.addLayout(template_input_layout)
+        template_group.setLayout(template_layout)
+        layout.addWidget(template_group)
+
+        # 日期来源组
+        source_group = QGroupBox("日期来源")
+        source_layout = QVBoxLayout()
+        source_layout.setSpacing(16)  # 增加元素之间的间距
+        source_layout.setContentsMargins(16, 20, 16, 16)  # 调整内边距
+        
+        # 首选日期来源
+        primary_layout = QHBoxLayout()
+        primary_layout.setSpacing(12)  # 调整水平间距
+        primary_label = QLabel("首选日期来源")
+        primary_label.setStyleSheet("color: #666666; font-size: 13px;")
+        primary_label.setFixedWidth(100)  # 固定标签宽度
+        primary_layout.addWidget(primary_label)
+        
+        self.date_source = QComboBox()
+        self.date_source.addItems(["拍摄日期", "修改日期", "创建日期", "当前日期"])
+        self.date_source.setCurrentText(self.settings.get("date_source", "拍摄日期"))
+        self.date_source.setStyleSheet("""
+            QComboBox {
+                padding: 6px 12px;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                background: white;
+                min-width: 200px;
+                height: 32px;
+            }
+            QComboBox:hover {
+                border-color: #999999;
+            }
+            QComboBox:focus {
+                border-color: #2196F3;
+            }
+        """)
+        primary_layout.addWidget(self.date_source)
+        primary_layout.addStretch()
+        source_layout.addLayout(primary_layout)
+        
+        # 备选日期来源
+        fallback_layout = QHBoxLayout()
+        fallback_layout.setSpacing(12)  # 调整水平间距
+        fallback_label = QLabel("备选日期来源")
+        fallback_label.setStyleSheet("color: #666666; font-size: 13px;")
+        fallback_label.setFixedWidth(100)  # 固定标签宽度
+        fallback_layout.addWidget(fallback_label)
+        
+        self.fallback_date_source = QComboBox()
+        self.fallback_date_source.addItems(["修改日期", "创建日期", "当前日期"])
+        self.fallback_date_source.setCurrentText(self.settings.get("fallback_date_source", "修改日期"))
+        self.fallback_date_source.setStyleSheet("""
+            QComboBox {
+                padding: 6px 12px;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                background: white;
+                min-width: 200px;
+                height: 32px;
+            }
+            QComboBox:hover {
+                border-color: #999999;
+            }
+            QComboBox:focus {
+                border-color: #2196F3;
+            }
+        """)
+        fallback_layout.addWidget(self.fallback_date_source)
+        fallback_layout.addStretch()
+        source_layout.addLayout(fallback_layout)
+
+        # 非媒体文件选项
+        non_media_layout = QHBoxLayout()
+        non_media_layout.setSpacing(12)  # 调整水平间距
+        self.enable_non_media = QCheckBox("非媒体文件日期来源")
+        self.enable_non_media.setChecked(self.settings.get("enable_non_media", False))
+        self.enable_non_media.setStyleSheet("""
+            QCheckBox {
+                color: #666666;
+                font-size: 13px;
+                padding: 4px 0;
+            }
+            QCheckBox::indicator {
+                width: 18px;
+                height: 18px;
+                border: 1px solid #e0e0e0;
+                border-radius: 4px;
+            }
+            QCheckBox::indicator:hover {
+                border-color: #999999;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #2196F3;
+                border-color: #2196F3;
+            }
+        """)
+        non_media_layout.addWidget(self.enable_non_media)
+        
+        self.non_media_date_source = QComboBox()
+        self.non_media_date_source.addItems(["创建日期", "修改日期", "当前日期"])
+        self.non_media_date_source.setCurrentText(self.settings.get("non_media_date_source", "创建日期"))
+        self.non_media_date_source.setEnabled(self.enable_non_media.isChecked())
+        self.enable_non_media.toggled.connect(self.non_media_date_source.setEnabled)
+        self.non_media_date_source.setStyleSheet("""
+            QComboBox {
+                padding: 6px 12px;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                background: white;
+                min-width: 200px;
+                height: 32px;
+            }
+            QComboBox:hover {
+                border-color: #999999;
+            }
+            QComboBox:focus {
+                border-color: #2196F3;
+            }
+            QComboBox:disabled {
+                background: #f5f5f5;
+                color: #999999;
+            }
+        """)
+        non_media_layout.addWidget(self.non_media_date_source)
+        non_media_layout.addStretch()
+        source_layout.addLayout(non_media_layout)
+        
+        source_group.setLayout(source_layout)
+        layout.addWidget(source_group)
+
+        # 性能组
+        performance_group = QGroupBox("性能")
+        performance_layout = QHBoxLayout()
+        performance_layout.setSpacing(12)
+        performance_layout.setContentsMargins(16, 20, 16, 16)  # 调整内边距
+        workers_label = QLabel("读取线程数")
+        workers_label.setStyleSheet("color: #666666; font-size: 13px;")
+        workers_label.setFixedWidth(100)  # 固定标签宽度
+        performance_layout.addWidget(workers_label)
+
+        self.metadata_workers = QSpinBox()
+        self.metadata_workers.setRange(1, MAX_METADATA_WORKERS)
+        self.metadata_workers.setValue(self.settings.get("metadata_workers", DEFAULT_METADATA_WORKERS))
+        self.metadata_workers.setToolTip("同时读取文件日期的线程数，网络存储或固态硬盘可适当调大")
+        self.metadata_workers.setStyleSheet("""
+            QSpinBox {
+                padding: 6px 12px;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                background: white;
+                min-width: 80px;
+                height: 32px;
+            }
+            QSpinBox:hover {
+                border-color: #999999;
+            }
+            QSpinBox:focus {
+                border-color: #2196F3;
+            }
+        """)
+        performance_layout.addWidget(self.metadata_workers)
+
+        # 读取日期的方式，自动模式下大批量文件且CPU核数较多时使用多进程
+        self.metadata_backend = QComboBox()
+        for text, backend in (("自动", "auto"), ("多线程", "thread"), ("多进程", "process")):
+            self.metadata_backend.addItem(text, backend)
+        self.metadata_backend.setCurrentIndex(
+            max(self.metadata_backend.findData(self.settings.get("metadata_backend", "auto")), 0))
+        self.metadata_backend.setToolTip("多进程可以同时利用多个CPU核心解析RAW/HEIC等文件，适合数万个文件以上的批量处理")
+        self.metadata_backend.setStyleSheet("""
+            QComboBox {
+                padding: 6px 12px;
+                border: 1px solid #e0e0e0;
+                border-radius: 6px;
+                background: white;
+                min-width: 80px;
+                height: 32px;
+            }
+            QComboBox:hover {
+                border-color: #999999;
+            }
+            QComboBox:focus {
+                border-color: #2196F3;
+            }
+        """)
+        performance_layout.addWidget(self.metadata_backend)
+
+        # 网络存储模式：同时发出更多读取，把每次访问的往返延迟重叠起来
+        self.network_mode = QComboBox()
+        for text, mode in (("网络存储：自动检测", "auto"), ("网络存储：开启", "on"), ("网络存储：关闭", "off")):
+            self.network_mode.addItem(text, mode)
+        self.network_mode.setCurrentIndex(max(self.network_mode.findData(self.settings.get("network_mode", "auto")), 0))
+        self.network_mode.setToolTip("文件位于SMB/NFS等网络存储上时，同时进行更多读取并按块读取文件头，"
+                                     "并发数可在 settings.json 的 network_queue_depth 中调整")
+        self.network_mode.setStyleSheet(self.metadata_backend.styleSheet())
+        performance_layout.addWidget(self.network_mode)
+
+        self.metadata_cache = QCheckBox("缓存拍摄日期")
+        self.metadata_cache.setChecked(self.settings.get("metadata_cache", True))
+        self.metadata_cache.setToolTip("记住已读取过的文件日期，文件未修改时再次处理无需重新读取")
+        self.metadata_cache.setStyleSheet("""
+            QCheckBox {
+                color: #666666;
+                font-size: 13px;
+                padding: 4px 0;
+            }
+            QCheckBox::indicator {
+                width: 18px;
+                height: 18px;
+                border: 1px solid #e0e0e0;
+                border-radius: 4px;
+            }
+            QCheckBox::indicator:hover {
+                border-color: #999999;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #2196F3;
+                border-color: #2196F3;
+            }
+        """)
+        performance_layout.addWidget(self.metadata_cache)
+        performance_layout.addStretch()
+
+        performance_group.setLayout(performance_layout)
+        layout.addWidget(performance_group)
+
+        # 重名处理组
+        handling_group = QGroupBox("重名处理")
+        handling_layout = QGridLayout()
+        handling_layout.setHorizontalSpacing(20)
+        handling_layout.setContentsMargins(16, 20, 16, 16)  # 调整内边距
+        
+        self.duplicate_handling = QButtonGroup(self)
+        handling_labels = {
+            "keep_original": "保留原名称",
+            "add_suffix": "增加序号后缀",
+            "skip_identical": "内容相同时跳过",
+            "quarantine_identical": "内容相同时移到“重复文件”文件夹",
+        }
+        current_handling = self.settings.get("duplicate_handling", "add_suffix")
+        # 内容相同的文件只在目标名称重名时才比较，没有重名时不读取文件内容
+        for position, value in enumerate(("keep_original", "add_suffix", "skip_identical", "quarantine_identical")):
+            button = QRadioButton(handling_labels[value])
+            button.setStyleSheet("""
+                QRadioButton {
+                    color: #666666;
+                    font-size: 13px;
+                    padding: 4px 0;
+                }
+                QRadioButton::indicator {
+                    width: 18px;
+                    height: 18px;
+                    border: 1px solid #e0e0e0;
+                    border-radius: 9px;
+                }
+                QRadioButton::indicator:hover {
+                    border-color: #999999;
+                }
+                QRadioButton::indicator:checked {
+                    background-color: #2196F3;
+                    border-color: #2196F3;
+                }
+            """)
+            self.duplicate_handling.addButton(button, DUPLICATE_HANDLING.index(value))
+            button.setChecked(value == current_handling)
+            handling_layout.addWidget(button, position // 2, position % 2)
+        if self.duplicate_handling.checkedButton() is None:
+            self.duplicate_handling.button(DUPLICATE_HANDLING.index("add_suffix")).setChecked(True)
+        handling_layout.setColumnStretch(2, 1)
+        
+        handling_group.setLayout(handling_layout)
+        layout.addWidget(handling_group)
+
+        # 按钮区域
+        btn_layout = QHBoxLayout()
+        btn_layout.setSpacing(12)
+        btn_layout.addStretch()
+        
+        self.save_btn = QPushButton("保存")
+        self.save_btn.setStyleSheet("""
+            QPushButton {
+                background: #2196F3;
+                color: white;
+                border: none;
+                padding: 8px 24px;
+                border-radius: 6px;
+                font-size: 14px;
+                min-width: 100px;
+                height: 36px;
+            }
+            QPushButton:hover {
+                background: #1976D2;
+            }
+            QPushButton:pressed {
+                background: #1565C0;
+            }
+        """)
+        self.save_btn.clicked.connect(self.save_settings)
+        btn_layout.addWidget(self.save_btn)
+        
+        self.back_btn = QPushButton("返回")
+        self.back_btn.setStyleSheet("""
+            QPushButton {
+                background: #f5f5f5;
+                color: #666666;
+                border: 1px solid #e0e0e0;
+                padding: 8px 24px;
+                border-radius: 6px;
+                font-size: 14px;
+                min-width: 100px;
+                height: 36px;
+            }
+            QPushButton:hover {
+                background: #e0e0e0;
+            }
+            QPushButton:pressed {
+                background: #d0d0d0;
+            }
+        """)
+        self.back_btn.clicked.connect(self.return_to_main)
+        btn_layout.addWidget(self.back_btn)
+
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+        
+        # 设置初始模板
+        template = self.settings.get("name_template", "YYYYMMDD_HHMMSS_001")
+        self.custom_format.setText(template)
+
+    def load_settings(self):
+        return load_settings()
+
+    def save_settings(self):
+        # 保存前校验命名模板，避免到重命名时才发现错误
+        try:
+            NameTemplate(self.custom_format.text())
+        except TemplateError as e:
+            QMessageBox.warning(self, "命名模板错误", str(e))
+            return
+        # 在原有设置上更新，保留界面上没有的设置项
+        self.settings = dict(self.settings)
+        self.settings.update({
+            "date_source": self.date_source.currentText(),
+            "fallback_date_source": self.fallback_date_source.currentText(),
+            "name_template": self.custom_format.text(),
+            "custom_format": self.custom_format.text(),
+            "enable_non_media": self.enable_non_media.isChecked(),
+            "non_media_date_source": self.non_media_date_source.currentText(),
+            "metadata_workers": self.metadata_workers.value(),
+            "metadata_backend": self.metadata_backend.currentData(),
+            "network_mode": self.network_mode.currentData(),
+            "duplicate_handling": DUPLICATE_HANDLING[self.duplicate_handling.checkedId()],
+            "metadata_cache": self.metadata_cache.isChecked()
+        })
+        try:
+            with open("settings.json", "w", encoding="utf-8") as f:
+                json.dump(self.settings, f, ensure_ascii=False, indent=4)
+                # 更新主窗口的设置
+                if isinstance(self.parent, MainWindow):
+                    self.parent.settings = self.settings
+            self.return_to_main()
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"保存设置失败: {str(e)}")
+
+    def return_to_main(self):
+        if isinstance(self.parent, MainWindow):
+            self.parent.stacked_layout.setCurrentWidget(self.parent.main_panel)
+
+class DirectoryScanner(QThread):
+    """在后台线程中用 os.scandir 递归扫描文件夹，分批发送找到的文件"""
+    found = pyqtSignal(list)
+    done = pyqtSignal(bool)  # 参数表示是否被取消
+
+    # 每批最多包含的文件数和最长间隔（秒）
+    BATCH_SIZE = 2000
+    BATCH_INTERVAL = 0.1
+
+    def __init__(self, paths, include_all=False):
+        super().__init__()
+        self.paths = list(paths)
+        self.include_all = include_all
+        self.batch = []
+        self.last_emit_time = 0.0
+        self.stats = RunStats()
+
+    def run(self):
+        self.last_emit_time = time.monotonic()
+        for path in iter_supported_files(self.paths, self.include_all, self.isInterruptionRequested, self.stats):
+            self.add(path)
+        self.emit_batch()
+        self.done.emit(self.isInterruptionRequested())
+
+    def add(self, path):
+        self.batch.append(path)
+        if len(self.batch) >= self.BATCH_SIZE or time.monotonic() - self.last_emit_time >= self.BATCH_INTERVAL:
+            self.emit_batch()
+
+    def emit_batch(self):
+        if self.batch:
+            started = time.perf_counter()
+            self.found.emit(self.batch)
+            self.stats.record("progress", time.perf_counter() - started)
+            self.batch = []
+        self.last_emit_time = time.monotonic()
+
+
+class RenameWorker(QThread):
+    """在后台线程中运行重命名引擎，进度和计划通过信号发送到界面"""
+    # 每批进度为 [(行号, 源路径, 状态, 新路径或原因), ...]
+    progress = pyqtSignal(list)
+    planned = pyqtSignal(object)
+    finished = pyqtSignal(int)
+
+    def __init__(self, files, settings, dry_run=False, resume_plan=None, name_index=None, metadata_cache=None):
+        super().__init__()
+        self.engine = RenameEngine(files, settings, dry_run, resume_plan,
+                                   on_progress=self.progress.emit, on_planned=self.planned.emit,
+                                   is_cancelled=self.isInterruptionRequested,
+                                   name_index=name_index, metadata_cache=metadata_cache)
+
+    def run(self):
+        try:
+            success_count = self.engine.run()
+        except Exception as e:
+            # 出现意外错误时也要通知界面，否则按钮会一直停在“停止”
+            print(f"重命名出错: {str(e)}")
+            success_count = self.engine.success_count
+        self.finished.emit(success_count)
+
+
+class WatchWorker(QThread):
+    """在后台监视文件夹，写入完成的新文件分批发送到界面，界面重命名完这一批后才继续"""
+    ready = pyqtSignal(list)
+
+    def __init__(self, paths, settings, include_existing=False):
+        super().__init__()
+        self.session = WatchSession(paths, settings, include_existing=include_existing)
+        self.batch_finished = threading.Event()
+
+    def run(self):
+        try:
+            self.session.run(self.process_batch, self.isInterruptionRequested)
+        finally:
+            self.session.close()
+
+    def process_batch(self, files):
+        self.batch_finished.clear()
+        self.ready.emit(files)
+        # 界面线程调用 batch_done 之前不再处理新的事件；关闭窗口时也会调用 batch_done
+        self.batch_finished.wait()
+
+    def batch_done(self, targets):
+        """一批文件处理完毕，targets 为重命名得到的新路径，它们的事件不再处理"""
+        self.session.ignore(targets)
+        self.batch_finished.set()
+
+
+class UndoWorker(QThread):
+    """在后台按日志撤销上次重命名"""
+    finished = pyqtSignal(list, list)  # 已恢复的 (目标路径, 源路径)，失败的 ((源路径, 目标路径), 原因)
+
+    def __init__(self, settings):
+        super().__init__()
+        self.settings = settings
+
+    def run(self):
+        journal = RenameJournal()
+        restored, failed = [], []
+        try:
+            start, entries = journal.load_last_run()
+            if start is not None:
+                restored, failed = undo_rename_entries(
+                    entries, self.settings.get("metadata_workers", DEFAULT_METADATA_WORKERS))
+                journal.replace_last_run(start, [entry for entry, reason in failed])
+        except OSError as e:
+            print(f"撤销重命名失败: {str(e)}")
+        self.finished.emit(restored, failed)
+
+
+class RunStatsDialog(QDialog):
+    """显示上次运行各阶段的耗时统计和最慢的文件，可导出为JSON"""
+
+    def __init__(self, stats, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.setWindowTitle("运行统计")
+        self.resize(760, 480)
+        layout = QVBoxLayout(self)
+        text = QPlainTextEdit(stats.format_text())
+        text.setReadOnly(True)
+        text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        text.setFont(QFont("Consolas", 9))
+        layout.addWidget(text)
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        export_btn = QPushButton("导出JSON")
+        export_btn.clicked.connect(self.export_json)
+        buttons.addWidget(export_btn)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出运行统计", "run_stats.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.stats.export_json(path)
+        except OSError as e:
+            QMessageBox.warning(self, "错误", f"导出统计失败: {str(e)}")
+
+
+class FileTableModel(QAbstractTableModel):
+    """文件列表模型：文件名来自文件注册表，每行只额外保存1字节状态，文本按需生成"""
+
+    HEADERS = ("文件名", "状态")
+    # 一次插入的最大行数，避免一次性通知视图过多的行
+    INSERT_CHUNK = 10000
+    # 状态码（按下标保存在bytearray中）-> 计划状态
+    ROW_STATUSES = (None, PLAN_DONE, PLAN_UNCHANGED, PLAN_SKIP, PLAN_ERROR, PLAN_FAILED)
+    # 计划状态 -> (状态列符号, 颜色)
+    STATUS_MARKS = {
+        None: ("●", None),
+        PLAN_DONE: ("✓", QColor("#4CAF50")),
+        PLAN_UNCHANGED: ("✓", QColor("#4CAF50")),
+        PLAN_SKIP: ("○", QColor("#9E9E9E")),
+        PLAN_ERROR: ("✗", QColor("#F44336")),
+        PLAN_FAILED: ("✗", QColor("#F44336")),
+    }
+
+    def __init__(self, files, parent=None):
+        super().__init__(parent)
+        self.files = files
+        self.statuses = bytearray(len(files))
+        self.status_codes = {status: code for code, status in enumerate(self.ROW_STATUSES)}
+        self.reasons = {}   # 文件路径 -> 跳过或出错的原因（只保存少数行）
+        self.previews = {}  # 文件路径 -> 预览的新文件名
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if column == 0:
+            if role == Qt.ItemDataRole.DisplayRole:
+                file_path = self.files[row]
+                name = os.path.basename(file_path)
+                preview = self.previews.get(file_path)
+                return f"{name} → {preview}" if preview else name
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return self.reasons.get(self.files[row]) or self.files[row]
+        else:
+            status = self.ROW_STATUSES[self.statuses[row]]
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self.STATUS_MARKS[status][0]
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return self.STATUS_MARKS[status][1]
+            if role == Qt.ItemDataRole.TextAlignmentRole:
+                return Qt.AlignmentFlag.AlignCenter
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return self.reasons.get(self.files[row])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation != Qt.Orientation.Horizontal:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if section == 0:
+                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def append_files(self, paths):
+        """分块追加文件，重复的文件被忽略，返回新增的数量"""
+        new_paths = [path for path in dict.fromkeys(paths) if path not in self.files]
+        for start in range(0, len(new_paths), self.INSERT_CHUNK):
+            chunk = new_paths[start:start + self.INSERT_CHUNK]
+            first = len(self.files)
+            self.beginInsertRows(QModelIndex(), first, first + len(chunk) - 1)
+            self.files.extend(chunk)
+            self.statuses.extend(bytes(len(chunk)))
+            self.endInsertRows()
+        return len(new_paths)
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        file_path = self.files.remove(row)
+        del self.statuses[row]
+        self.reasons.pop(file_path, None)
+        self.previews.pop(file_path, None)
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.files.clear()
+        self.statuses = bytearray()
+        self.reasons.clear()
+        self.previews.clear()
+        self.endResetModel()
+
+    def set_status(self, row, status, reason=""):
+        """修改一行的状态，不通知视图，修改完一批后调用 rows_changed"""
+        file_path = self.files[row]
+        self.statuses[row] = self.status_codes[status]
+        if reason:
+            self.reasons[file_path] = reason
+        else:
+            self.reasons.pop(file_path, None)
+
+    def rename(self, row, new_path):
+        old_path = self.files[row]
+        self.files.rename(row, new_path)
+        self.previews.pop(old_path, None)
+        if old_path in self.reasons:
+            self.reasons[new_path] = self.reasons.pop(old_path)
+
+    def rows_changed(self, first, last):
+        self.dataChanged.emit(self.index(first, 0), self.index(last, self.columnCount() - 1))
+
+    def set_previews(self, previews, reasons):
+        self.previews = previews
+        self.reasons.update(reasons)
+        if self.files:
+            self.rows_changed(0, len(self.files) - 1)
+
+    def clear_previews(self):
+        if self.previews:
+            self.previews = {}
+            self.rows_changed(0, len(self.files) - 1)
+
+
+class FileTableView(QTableView):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+        # 禁用双击编辑
+        self.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        # 所有行等高，视图无需逐行测量，百万行也能流畅滚动
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(32)
+
+    def show_context_menu(self, pos):
+        menu = QMenu(self)
+        
+        # 获取当前选中的行
+        row = self.rowAt(pos.y())
+        if row >= 0:
+            # 添加删除选项
+            delete_action = QAction("从列表中移除", self)
+            delete_action.triggered.connect(lambda: self.remove_file(row))
+            menu.addAction(delete_action)
+            
+            menu.addSeparator()
+
+        # 添加预览选项（只生成计划，不修改文件）
+        if isinstance(self.parent, MainWindow) and self.parent.files:
+            preview_action = QAction("预览新文件名", self)
+            preview_action.triggered.connect(self.parent.preview_rename)
+            menu.addAction(preview_action)
+        
+        # 添加撤销选项（按日志恢复上次重命名前的文件名）
+        if isinstance(self.parent, MainWindow) and os.path.exists(RenameJournal.JOURNAL_FILE):
+            undo_action = QAction("撤销上次重命名", self)
+            undo_action.triggered.connect(self.parent.undo_last_rename)
+            menu.addAction(undo_action)
+
+        # 添加运行统计选项（上次重命名各阶段的耗时）
+        if isinstance(self.parent, MainWindow) and self.parent.last_run_stats is not None:
+            stats_action = QAction("查看运行统计", self)
+            stats_action.triggered.connect(self.parent.show_run_stats)
+            menu.addAction(stats_action)
+
+        # 添加监视文件夹选项（新文件写入完成后自动重命名）
+        if isinstance(self.parent, MainWindow):
+            if self.parent.watch_worker is None:
+                watch_action = QAction("监视文件夹...", self)
+                watch_action.triggered.connect(self.parent.start_watch)
+            else:
+                watch_action = QAction("停止监视", self)
+                watch_action.triggered.connect(self.parent.stop_watch)
+            menu.addAction(watch_action)
+
+        # 添加清空列表选项
+        clear_action = QAction("清空列表", self)
+        clear_action.triggered.connect(self.clear_all)
+        menu.addAction(clear_action)
+        
+        menu.exec(self.mapToGlobal(pos))
+
+    def remove_file(self, row):
+        if isinstance(self.parent, MainWindow):
+            self.parent.file_model.remove_row(row)
+            # 更新状态栏显示
+            self.parent.update_list_button_text()
+
+    def clear_all(self):
+        if isinstance(self.parent, MainWindow):
+            # 清空列表时一并停止正在进行的扫描
+            self.parent.cancel_scan()
+            self.parent.clear_files()
+
+class MainWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Qdrop2name 1.0.9 —— QwejayHuang")
+        
+        # 设置应用程序图标
+        icon_path = os.path.join(APP_DIR, "icon.ico")
+        if os.path.exists(icon_path):
+            self.setWindowIcon(QIcon(icon_path))
+            print(f"已加载图标: {icon_path}")
+        else:
+            print(f"警告: 图标文件不存在 - {icon_path}")
+        
+        self.setStyleSheet("""
+            QMainWindow {
+                background-color: #ffffff;
+            }
+            QPushButton {
+                background: #2196F3;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 6px;
+                font-size: 14px;
+                min-width: 80px;
+                min-height: 36px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background: #1976D2;
+            }
+            QPushButton:pressed {
+                background: #1565C0;
+            }
+            QPushButton:disabled {
+                background: #BDBDBD;
+                color: #E0E0E0;
+            }
+            QPushButton#renameButton {
+                background: #F44336;
+            }
+            QPushButton#renameButton:hover {
+                background: #D32F2F;
+            }
+            QPushButton#renameButton:pressed {
+                background: #B71C1C;
+            }
+            QPushButton#renameButton:disabled {
+                background: #BDBDBD;
+                color: #E0E0E0;
+            }
+            QTableView {
+                border: 1px solid #e0e0e0;
+                border-radius: 8px;
+                background-color: white;
+                font-size: 13px;
+                gridline-color: #f5f5f5;
+                outline: none;  /* 去掉表格的焦点边框 */
+            }
+            QTableView::item {
+                padding: 8px;
+                border-bottom: 1px solid #f5f5f5;
+            }
+            QTableView::item:selected {
+                background-color: #e8f0fe;
+                color: #1a73e8;
+                outline: none;  /* 去掉选中时的虚线边框 */
+            }
+            QTableView::item:focus {
+                outline: none;  /* 去掉焦点时的虚线边框 */
+                border: none;   /* 去掉边框 */
+            }
+            QHeaderView::section {
+                background-color: #f8f8f8;
+                padding: 8px;
+                border: none;
+                border-bottom: 1px solid #e0e0e0;
+                font-weight: bold;
+            }
+            QStatusBar {
+                background-color: #f5f5f5;
+                color: #666666;
+                border-top: 1px solid #e0e0e0;
+                padding: 5px;
+            }
+            QStatusBar QLabel {
+                color: #666666;
+                font-size: 14px;
+                padding: 5px;
+                border-radius: 4px;
+            }
+            QStatusBar QLabel:hover {
+                background-color: #e8e8e8;
+            }
+            #closeButton {
+                background: none;
+                border: none;
+                color: #999999;
+                font-size: 16px;
+                padding: 5px;
+                border-radius: 4px;
+            }
+            #closeButton:hover {
+                background-color: #f0f0f0;
+                color: #666666;
+            }
+            QMenu {
+                background-color: white;
+                border: 1px solid #e0e0e0;
+                border-radius: 4px;
+                padding: 4px;
+            }
+            QMenu::item {
+                padding: 6px 20px;
+                border-radius: 2px;
+            }
+            QMenu::item:selected {
+                background-color: #e8f0fe;
+                color: #1a73e8;
+            }
+        """)
+        self.mark_startup("主窗口图标和样式表")
+        self.files = FileRegistry()
+        self.scanners = []
+        # 扫描耗时累计到下一次重命名的统计中
+        self.scan_stats = RunStats()
+        self.last_run_stats = None
+        # 监视文件夹的线程，以及当前这一批已重命名得到的新路径（不在处理监视批次时为None）
+        self.watch_worker = None
+        self.watch_targets = None
+        self.settings = self.load_settings()
+        self.mark_startup("读取设置")
+        self.has_renamed = False
+        self.init_ui()
+        self.mark_startup("构建界面")
+        self.setup_animations()
+        self.mark_startup("按钮动画")
+
+    def mark_startup(self, phase):
+        if STARTUP_TRACE is not None:
+            STARTUP_TRACE.mark(phase)
+
+    def setup_animations(self):
+        # 为开始按钮设置动画
+        self.start_animation = QPropertyAnimation(self.action_btn, b"geometry")
+        self.start_animation.setDuration(150)
+        self.start_animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+
+        # 为设置按钮设置动画
+        self.settings_animation = QPropertyAnimation(self.settings_btn, b"geometry")
+        self.settings_animation.setDuration(150)
+        self.settings_animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+
+        # 为展开按钮设置动画
+        self.toggle_animation = QPropertyAnimation(self.toggle_list_btn, b"geometry")
+        self.toggle_animation.setDuration(150)
+        self.toggle_animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+
+    def enterEvent(self, event):
+        # 鼠标进入按钮区域时触发动画
+        if self.action_btn.underMouse():
+            self.animate_button(self.action_btn, self.start_animation, True)
+        elif self.settings_btn.underMouse():
+            self.animate_button(self.settings_btn, self.settings_animation, True)
+        elif self.toggle_list_btn.underMouse():
+            self.animate_button(self.toggle_list_btn, self.toggle_animation, True)
+
+    def leaveEvent(self, event):
+        # 鼠标离开按钮区域时触发动画
+        if self.action_btn.underMouse():
+            self.animate_button(self.action_btn, self.start_animation, False)
+        elif self.settings_btn.underMouse():
+            self.animate_button(self.settings_btn, self.settings_animation, False)
+        elif self.toggle_list_btn.underMouse():
+            self.animate_button(self.toggle_list_btn, self.toggle_animation, False)
+
+    def animate_button(self, button, animation, is_enter):
+        # 获取按钮当前位置
+        current_geometry = button.geometry()
+        
+        # 设置动画起始和结束位置
+        if is_enter:
+            # 鼠标进入时，按钮稍微上移
+            animation.setStartValue(current_geometry)
+            animation.setEndValue(current_geometry.adjusted(0, -2, 0, -2))
+        else:
+            # 鼠标离开时，按钮回到原位
+            animation.setStartValue(current_geometry)
+            animation.setEndValue(current_geometry.adjusted(0, 2, 0, 2))
+        
+        # 启动动画
+        animation.start()
+
+    def init_ui(self):
+        self.setMinimumSize(500, 600)
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        self.stacked_layout = QStackedLayout(central_widget)
+
+        # 主内容区
+        self.main_panel = QWidget()
+        layout = QVBoxLayout(self.main_panel)
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        # 拖放区域
+        self.drop_area = DropArea(self)
+        self.drop_area.setMinimumHeight(200)
+        layout.addWidget(self.drop_area)
+
+        # 文件列表容器
+        list_container = QWidget()
+        list_layout = QVBoxLayout(list_container)
+        list_layout.setContentsMargins(0, 0, 0, 0)
+        list_layout.setSpacing(0)
+
+        # 文件列表
+        self.file_model = FileTableModel(self.files, self)
+        self.file_list = FileTableView(self)
+        self.file_list.setModel(self.file_model)
+        self.file_list.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.file_list.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
+        self.file_list.setColumnWidth(1, 60)
+        self.file_list.setMinimumHeight(200)
+        self.file_list.setVisible(False)
+        self.file_list.setShowGrid(False)
+        self.file_list.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.file_list.verticalHeader().setVisible(False)
+        # 添加平滑滚动
+        self.file_list.setVerticalScrollMode(QTableView.ScrollMode.ScrollPerPixel)
+        self.file_list.setHorizontalScrollMode(QTableView.ScrollMode.ScrollPerPixel)
+        list_layout.addWidget(self.file_list)
+        
+        list_container.hide()
+        layout.addWidget(list_container)
+        self.list_container = list_container
+
+        # 按钮区域
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(12)
+        button_layout.setContentsMargins(0, 10, 0, 0)  # 添加上边距
+
+        # 添加展开/隐藏按钮
+        self.toggle_list_btn = AnimatedButton("▼")
+        self.toggle_list_btn.setStyleSheet("""
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
+                    stop:0 #f0f0f0, stop:1 #e8e8e8);
+                color: #333333;
+                border: 1px solid #e0e0e0;
+                padding: 8px;
+                border-radius: 6px;
+                font-size: 14px;
+                min-width: 32px;
+                max-width: 32px;
+            }
+            QPushButton:hover {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
+                    stop:0 #e8e8e8, stop:1 #d8d8d8);
+                border-color: #d0d0d0;
+            }
+            QPushButton:pressed {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
+                    stop:0 #d8d8d8, stop:1 #c8c8c8);
+            }
+        """)
+        self.toggle_list_btn.clicked.connect(self.toggle_file_list)
+        button_layout.addWidget(self.toggle_list_btn)
+        
+        self.action_btn = AnimatedButton("开始")
+        self.action_btn.setObjectName("actionButton")
+        self.action_btn.setStyleSheet("""
+            QPushButton {
+                background: #2196F3;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 6px;
+                font-size: 14px;
+                min-width: 80px;
+                min-height: 36px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background: #1976D2;
+            }
+            QPushButton:pressed {
+                background: #1565C0;
+            }
+            QPushButton:disabled {
+                background: #BDBDBD;
+                color: #E0E0E0;
+            }
+        """)
+        self.action_btn.clicked.connect(self.toggle_action)
+        button_layout.addWidget(self.action_btn)
+        
+        self.settings_btn = AnimatedButton("⚙")
+        self.settings_btn.setStyleSheet("""
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
+                    stop:0 #f0f0f0, stop:1 #e8e8e8);
+                color: #333333;
+                border: 1px solid #e0e0e0;
+                padding: 8px;
+                border-radius: 6px;
+                font-size: 16px;
+                min-width: 32px;
+                max-width: 32px;
+                font-family: "Segoe UI Symbol", "Arial Unicode MS", "Microsoft YaHei";
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
+                    stop:0 #e8e8e8, stop:1 #d8d8d8);
+                border-color: #d0d0d0;
+            }
+            QPushButton:pressed {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, 
+                    stop:0 #d8d8d8, stop:1 #c8c8c8);
+            }
+        """)
+        self.settings_btn.clicked.connect(self.show_settings)
+        button_layout.addWidget(self.settings_btn)
+        
+        layout.addLayout(button_layout)
+        self.stacked_layout.addWidget(self.main_panel)
+
+        # 设置面板在第一次打开时才创建，缩短启动时间
+        self.settings_panel = None
+        self.stacked_layout.setCurrentWidget(self.main_panel)
+
+        # 状态栏
+        self.statusBar = self.statusBar()
+        self.status_label = QLabel("")
+        self.statusBar.addWidget(self.status_label)
+
+    def toggle_file_list(self):
+        if self.list_container.isVisible():
+            self.hide_file_list()
+        else:
+            self.show_file_list()
+
+    def show_file_list(self, event=None):
+        if not self.list_container.isVisible():
+            self.list_container.show()
+            self.file_list.setVisible(True)
+            self.toggle_list_btn.setText("▲")  # 展开时显示向上三角形
+            self.update_list_button_text()
+            # 自动滚动到最后一行
+            if self.file_model.rowCount() > 0:
+                self.file_list.scrollToBottom()
+
+    def hide_file_list(self):
+        self.list_container.hide()
+        self.file_list.setVisible(False)
+        self.toggle_list_btn.setText("▼")  # 隐藏时显示向下三角形
+        self.update_list_button_text()
+
+    def show_message(self, message, duration=3000):
+        """显示状态栏消息"""
+        # 如果当前正在显示进度消息，不要覆盖它
+        if duration == 0 and "正在重命名" in self.status_label.text():
+            return
+        self.status_label.setText(message)
+        # 如果设置了持续时间，则定时恢复显示文件信息
+        if duration > 0:
+            QTimer.singleShot(duration, self.update_list_button_text)
+
+    def update_list_button_text(self):
+        if not self.files:
+            self.status_label.setText("")  # 空列表时状态栏不显示任何内容
+            return
+
+        # 获取最新的文件信息
+        latest_file = self.files[-1]
+        file_name = os.path.basename(latest_file)
+        if len(self.files) == 1:
+            self.status_label.setText(file_name)
+        else:
+            self.status_label.setText(f"共{len(self.files)}个文件")
+            # 确保状态栏文本不会太长
+            if len(self.status_label.text()) > 50:
+                self.status_label.setText(f"共{len(self.files)}个文件 - {file_name[:30]}...")
+
+    def scan_paths(self, paths):
+        """在后台扫描拖入或选择的文件和文件夹"""
+        scanner = DirectoryScanner(paths, self.settings.get("enable_non_media", False))
+        scanner.found.connect(self.add_scanned_files)
+        scanner.done.connect(lambda cancelled, scanner=scanner: self.scan_finished(scanner, cancelled))
+        self.scanners.append(scanner)
+        scanner.start()
+        self.update_scan_label()
+
+    def add_scanned_files(self, files):
+        self.add_files(files)
+        self.update_scan_label()
+
+    def scan_finished(self, scanner, cancelled):
+        scanner.wait()
+        self.scan_stats.merge(scanner.stats)
+        if scanner in self.scanners:
+            self.scanners.remove(scanner)
+        if not self.is_scanning():
+            if self.files:
+                suffix = "（扫描已取消）" if cancelled else ""
+                self.drop_area.label.setText(f"已选择 {len(self.files)} 个文件{suffix}")
+            else:
+                self.drop_area.reset_label()
+
+    def update_scan_label(self):
+        if self.is_scanning():
+            self.drop_area.label.setText(f"正在扫描... 已找到 {len(self.files)} 个文件\n点击取消")
+
+    def is_scanning(self):
+        return any(scanner.isRunning() for scanner in self.scanners)
+
+    def cancel_scan(self):
+        for scanner in self.scanners:
+            scanner.requestInterruption()
+
+    def add_files(self, files):
+        # 如果已经进行过重命名操作，则清空列表
+        if self.has_renamed:
+            self.clear_files()
+            self.has_renamed = False
+
+        # 添加新文件（模型会忽略重复的文件）
+        self.file_model.append_files(files)
+
+        # 如果列表可见，则自动滚动到底部
+        if self.file_list.isVisible():
+            self.file_list.scrollToBottom()
+        # 更新状态栏显示
+        self.update_list_button_text()
+
+    def show_settings(self):
+        if self.settings_panel is None:
+            self.settings_panel = SettingsPanel(self)
+            self.settings_panel.back_btn.clicked.connect(self.show_main_panel)
+            self.stacked_layout.addWidget(self.settings_panel)
+        # 创建动画
+        self.animation = QPropertyAnimation(self.stacked_layout.currentWidget(), b"geometry")
+        self.animation.setDuration(250)
+        self.animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+        
+        # 设置动画起始和结束位置
+        start_geometry = self.stacked_layout.currentWidget().geometry()
+        self.animation.setStartValue(start_geometry)
+        
+        # 切换到设置面板
+        self.stacked_layout.setCurrentWidget(self.settings_panel)
+        
+        # 设置动画结束位置
+        end_geometry = self.settings_panel.geometry()
+        self.animation.setEndValue(end_geometry)
+        
+        # 启动动画
+        self.animation.start()
+
+    def show_main_panel(self):
+        # 创建动画
+        self.animation = QPropertyAnimation(self.stacked_layout.currentWidget(), b"geometry")
+        self.animation.setDuration(250)
+        self.animation.setEasingCurve(QEasingCurve.Type.OutCubic)
+        
+        # 设置动画起始和结束位置
+        start_geometry = self.stacked_layout.currentWidget().geometry()
+        self.animation.setStartValue(start_geometry)
+        
+        # 切换到主面板
+        self.stacked_layout.setCurrentWidget(self.main_panel)
+        
+        # 设置动画结束位置
+        end_geometry = self.main_panel.geometry()
+        self.animation.setEndValue(end_geometry)
+        
+        # 启动动画
+        self.animation.start()
+
+    def toggle_action(self):
+        if self.action_btn.text() == "开始":
+            if self.is_scanning():
+                self.show_message("正在扫描文件，请稍候", 2000)
+                return
+            if not self.files:
+                self.show_message("请先添加文件", 2000)
+                return
+            if not self.start_rename():
+                return
+            self.action_btn.setText("停止")
+            self.action_btn.setObjectName("renameButton")
+            self.action_btn.setStyleSheet("""
+                QPushButton {
+                    background: #F44336;
+                    color: white;
+                    border: none;
+                    padding: 8px 16px;
+                    border-radius: 6px;
+                    font-size: 14px;
+                    min-width: 80px;
+                    min-height: 36px;
+                    font-weight: bold;
+                }
+                QPushButton:hover {
+                    background: #D32F2F;
+                }
+                QPushButton:pressed {
+                    background: #B71C1C;
+                }
+            """)
+        else:
+            # 按钮状态在工作线程真正结束后由 rename_finished 恢复
+            self.stop_rename()
+
+    def preview_rename(self):
+        """生成重命名计划并在列表中显示新文件名，不修改任何文件"""
+        if not self.files or self.is_worker_running():
+            return
+        try:
+            self.preview_worker = RenameWorker(self.files, self.settings, dry_run=True)
+        except TemplateError as e:
+            QMessageBox.warning(self, "命名模板错误", str(e))
+            return
+        self.preview_worker.planned.connect(self.show_preview)
+        self.preview_worker.start()
+        self.show_message("正在生成预览...", 0)
+
+    def show_preview(self, plan):
+        # 按路径保存预览，生成计划期间列表被修改也不会错位
+        previews = {entry.source: os.path.basename(entry.target) for entry in plan if entry.status == PLAN_RENAME}
+        reasons = {entry.source: entry.reason for entry in plan if entry.reason}
+        self.file_model.set_previews(previews, reasons)
+        self.show_message(f"预览：{len(previews)} 个文件将被重命名", 3000)
+
+    def reset_file_names(self):
+        """去掉预览时显示的新文件名"""
+        self.file_model.clear_previews()
+
+    def is_worker_running(self):
+        return any(worker is not None and worker.isRunning()
+                   for worker in (getattr(self, 'worker', None), getattr(self, 'preview_worker', None),
+                                  getattr(self, 'undo_worker', None)))
+
+    def undo_last_rename(self):
+        """把上次重命名过的文件改回原来的文件名"""
+        if self.is_worker_running():
+            return
+        start, entries = RenameJournal().load_last_run()
+        if start is None or not entries:
+            self.show_message("没有可以撤销的重命名")
+            return
+        reply = QMessageBox.question(
+            self, "撤销重命名", f"将把上次重命名的 {len(entries)} 个文件恢复为原来的文件名，是否继续？")
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        # 撤销后中断的计划已失效
+        RenameCheckpoint().discard()
+        self.action_btn.setEnabled(False)
+        self.show_message("正在撤销重命名...", 0)
+        self.undo_worker = UndoWorker(self.settings)
+        self.undo_worker.finished.connect(self.undo_finished)
+        self.undo_worker.start()
+
+    def undo_finished(self, restored, failed):
+        self.action_btn.setEnabled(True)
+        self.reset_file_names()
+        # 同一目录按撤销顺序逐个改回，链式重命名也能对上
+        first_row = last_row = None
+        for target, source in restored:
+            row = self.files.row_of(target)
+            if row is None:
+                continue
+            self.file_model.rename(row, source)
+            self.file_model.set_status(row, None)
+            first_row = row if first_row is None else min(first_row, row)
+            last_row = row if last_row is None else max(last_row, row)
+        if first_row is not None:
+            self.file_model.rows_changed(first_row, last_row)
+        self.has_renamed = False
+        self.status_label.setText("")
+        if failed:
+            (source, target), reason = failed[0]
+            QTimer.singleShot(100, lambda: self.show_message(
+                f"已恢复 {len(restored)} 个文件，{len(failed)} 个失败（{os.path.basename(target)}: {reason}）", 5000))
+        else:
+            QTimer.singleShot(100, lambda: self.show_message(f"已恢复 {len(restored)} 个文件", 3000))
+
+    def start_rename(self):
+        """开始重命名，命名模板无效等原因未能开始时返回False"""
+        if not self.files:
+            return False
+        if hasattr(self, 'preview_worker'):
+            self.preview_worker.wait()
+        self.reset_file_names()
+        # 确保文件列表可见
+        if not self.list_container.isVisible():
+            self.show_file_list()
+        resume_plan = self.load_unfinished_plan()
+        # 继续上次的计划时，已完成的文件计入进度
+        self.progress_count = resume_plan.count(PLAN_DONE) if resume_plan else 0
+        try:
+            self.worker = RenameWorker(self.files, self.settings, resume_plan=resume_plan)
+        except TemplateError as e:
+            QMessageBox.warning(self, "命名模板错误", str(e))
+            return False
+        self.worker.progress.connect(self.update_progress)
+        self.worker.finished.connect(self.rename_finished)
+        self.worker.start()
+        # 添加状态栏提示
+        self.show_message("正在重命名文件...", 0)  # 持续显示直到完成
+        return True
+
+    def load_unfinished_plan(self):
+        """存在上次未完成的重命名时询问是否继续，返回要继续的计划或None"""
+        checkpoint = RenameCheckpoint()
+        if not checkpoint.exists():
+            return None
+        plan = checkpoint.load()
+        remaining = [entry for entry in plan.entries if entry.status == PLAN_RENAME] if plan else []
+        # 只有剩余的文件都在当前列表中时才能继续
+        if not remaining or any(entry.source not in self.files for entry in remaining):
+            checkpoint.discard()
+            return None
+        reply = QMessageBox.question(
+            self, "继续重命名",
+            f"上次的重命名未完成，还剩 {len(remaining)} 个文件。\n是否从中断处继续？\n（选择“否”将重新生成重命名计划）")
+        if reply == QMessageBox.StandardButton.Yes:
+            return plan
+        checkpoint.discard()
+        return None
+
+    def stop_rename(self):
+        """请求停止，工作线程会在当前文件处理完后结束，不会打断正在进行的重命名"""
+        if hasattr(self, 'worker') and self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.action_btn.setText("正在停止...")
+            self.action_btn.setEnabled(False)
+        else:
+            self.rename_finished(0)  # 传入0表示没有成功重命名的文件
+
+    def closeEvent(self, event):
+        # 关闭窗口前让正在运行的线程在文件之间停下
+        for worker in [getattr(self, 'worker', None), getattr(self, 'preview_worker', None),
+                       getattr(self, 'undo_worker', None)] + self.scanners:
+            if worker is not None and worker.isRunning():
+                worker.requestInterruption()
+                worker.wait()
+        if self.watch_worker is not None:
+            # 重命名线程已经停下，不会再有 rename_finished 通知监视线程
+            self.watch_worker.requestInterruption()
+            self.watch_worker.batch_done(self.watch_targets or [])
+            self.watch_worker.wait()
+        super().closeEvent(event)
+
+    def start_watch(self):
+        """选择一个文件夹进行监视，其中写入完成的新文件会自动重命名"""
+        if self.watch_worker is not None:
+            return
+        try:
+            NameTemplate(self.settings.get("name_template", ""))
+        except TemplateError as e:
+            QMessageBox.warning(self, "命名模板错误", str(e))
+            return
+        folder = QFileDialog.getExistingDirectory(self, "选择要监视的文件夹")
+        if not folder:
+            return
+        # 默认只处理新文件；文件夹中已有的文件要用户明确同意才重命名
+        reply = QMessageBox.question(
+            self, "监视文件夹",
+            "是否同时重命名该文件夹（包括子文件夹）中已有的文件？\n选择“否”将只处理开始监视后出现的新文件。",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel,
+            QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Cancel:
+            return
+        self.watch_worker = WatchWorker([folder], self.settings,
+                                        include_existing=reply == QMessageBox.StandardButton.Yes)
+        self.watch_worker.ready.connect(self.watch_batch_ready)
+        self.watch_worker.start()
+        self.show_message(f"正在监视: {folder}", 0)
+
+    def stop_watch(self):
+        """停止监视；正在重命名的一批会先完成"""
+        if self.watch_worker is None:
+            return
+        self.watch_worker.requestInterruption()
+        if self.watch_targets is None:
+            self.watch_worker.wait()
+            self.watch_worker = None
+            self.show_message("已停止监视", 3000)
+
+    def watch_batch_ready(self, files):
+        """监视到一批写入完成的新文件，加入列表并重命名"""
+        if self.watch_worker is None:
+            return
+        if self.is_worker_running() or self.is_scanning() or self.action_btn.text() != "开始":
+            # 正在进行其他操作，稍后再处理这一批
+            QTimer.singleShot(1000, lambda: self.watch_batch_ready(files))
+            return
+        if self.watch_worker.isInterruptionRequested():
+            self.watch_worker.batch_done([])
+            self.stop_watch()
+            return
+        self.add_files(files)
+        self.reset_file_names()
+        if not self.list_container.isVisible():
+            self.show_file_list()
+        self.progress_count = 0
+        self.watch_targets = []
+        # 监视期间各批共用目录文件名索引和日期缓存，不必每批重新扫描目录
+        self.worker = RenameWorker(files, self.settings, name_index=self.watch_worker.session.name_index,
+                                   metadata_cache=self.watch_worker.session.metadata_cache)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.finished.connect(self.rename_finished)
+        self.action_btn.setEnabled(False)
+        self.worker.start()
+        self.show_message(f"监视中：正在重命名 {len(files)} 个新文件...", 0)
+
+    def update_progress(self, updates):
+        """一次性应用一批进度，成功计数增量维护，不再逐行扫描表格"""
+        started = time.perf_counter()
+        try:
+            self.apply_progress(updates)
+        finally:
+            self.worker.engine.stats.record("ui", time.perf_counter() - started)
+
+    def apply_progress(self, updates):
+        first_row = last_row = current_row = None
+        for row, source, status, detail in updates:
+            # 运行期间列表可能被修改，行号不匹配时按完整路径查找
+            if row >= len(self.files) or self.files[row] != source:
+                row = self.files.row_of(source)
+                if row is None:
+                    continue
+            if status == PLAN_DONE:
+                # 更新文件列表中的路径
+                self.file_model.rename(row, detail)
+                if self.watch_targets is not None:
+                    self.watch_targets.append(detail)
+            if status in (PLAN_DONE, PLAN_UNCHANGED):
+                self.progress_count += 1
+            self.file_model.set_status(row, status, "" if status == PLAN_DONE else detail)
+            first_row = row if first_row is None else min(first_row, row)
+            last_row = row if last_row is None else max(last_row, row)
+            current_row = row
+        if current_row is None:
+            return
+        # 整批只通知视图一次，并滚动到本批最后处理的一项
+        self.file_model.rows_changed(first_row, last_row)
+        self.file_list.scrollTo(self.file_model.index(current_row, 0))
+        # 状态栏和按钮显示进度
+        total_count = len(self.files)
+        self.show_message(f"正在重命名... ({self.progress_count}/{total_count})", 0)
+        if not self.worker.isInterruptionRequested() and self.watch_targets is None:
+            self.action_btn.setText(f"停止 ({self.progress_count}/{total_count})")
+
+    def rename_finished(self, success_count):
+        stopped = hasattr(self, 'worker') and self.worker.isInterruptionRequested()
+        if hasattr(self, 'worker') and self.last_run_stats is not self.worker.engine.stats:
+            # 本次运行的统计包括添加文件时的扫描耗时
+            self.last_run_stats = self.worker.engine.stats
+            self.last_run_stats.merge(self.scan_stats)
+            self.scan_stats = RunStats()
+        if self.watch_targets is not None:
+            # 监视到的一批已处理完，让监视线程继续
+            targets, self.watch_targets = self.watch_targets, None
+            self.watch_worker.batch_done(targets)
+            if self.watch_worker.isInterruptionRequested():
+                self.stop_watch()
+        self.action_btn.setEnabled(True)
+        self.action_btn.setText("开始")
+        self.action_btn.setObjectName("actionButton")
+        self.action_btn.setStyleSheet("""
+            QPushButton {
+                background: #2196F3;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 6px;
+                font-size: 14px;
+                min-width: 80px;
+                min-height: 36px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background: #1976D2;
+            }
+            QPushButton:pressed {
+                background: #1565C0;
+            }
+            QPushButton:disabled {
+                background: #BDBDBD;
+                color: #E0E0E0;
+            }
+        """)
+        if stopped:
+            self.status_label.setText("")
+            QTimer.singleShot(100, lambda: self.show_message(
+                f"已停止，已重命名 {success_count} 个文件，再次开始时可从中断处继续", 5000))
+            self.has_renamed = False  # 保留列表以便继续
+            return
+        # 只有在实际进行了重命名操作时才显示完成信息
+        if success_count > 0:
+            # 先清除进度消息
+            self.status_label.setText("")
+            # 然后显示完成消息
+            QTimer.singleShot(100, lambda: self.show_message(f"✓ 已重命名 {success_count} 个文件", 3000))
+            # 在拖动区域显示成功提示
+            self.drop_area.show_success(success_count)
+            self.has_renamed = True  # 标记已进行重命名操作
+        else:
+            self.show_message("没有文件被重命名", 3000)
+            self.update_list_button_text()
+
+    def show_run_stats(self):
+        if self.last_run_stats is not None:
+            RunStatsDialog(self.last_run_stats, self).exec()
+
+    def load_settings(self):
+        return load_settings()
+
+    def clear_files(self):
+        self.file_model.clear()
+        self.drop_area.label.setText("拖放文件或文件夹到这里\n或点击选择文件")
+        self.status_label.setText("")
+        self.list_container.hide()
+        self.has_renamed = False
+        self.scan_stats = RunStats()
+
+def main(started=None):
+    """启动图形界面，started 为入口脚本记录的启动计时起点"""
+    global STARTUP_TRACE
+    # 删除手动DPI设置，让Qt自行处理DPI
+    STARTUP_TRACE = StartupTrace(GUI_IMPORT_STARTED if started is None else started)
+    app = QApplication(sys.argv)
+    STARTUP_TRACE.mark("创建 QApplication")
+    
+    # 设置应用程序图标（在任务栏和任务管理器中显示）
+    icon_path = os.path.join(APP_DIR, "icon.ico")
+    if os.path.exists(icon_path):
+        app.setWindowIcon(QIcon(icon_path))
+        print(f"已加载图标: {icon_path}")
+    else:
+        print(f"警告: 图标文件不存在 - {icon_path}")
+    
+    # 设置应用程序样式
+    app.setStyle("Fusion")
+    # 设置默认字体
+    font = QFont("Microsoft YaHei", 9)
+    app.setFont(font)
+    window = MainWindow()
+    STARTUP_TRACE.watch_first_paint(window)
+    window.show()
+    STARTUP_TRACE.mark("显示主窗口")
+    return app.exec()
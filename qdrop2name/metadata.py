@@ -0,0 +1,679 @@
+"""拍摄日期读取：有限读取文件头的内置解析器、exif/pillow_heif 回退以及日期缓存"""
+
+import io
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+
+# 解析元数据时允许读取的最大字节数，避免为了几十字节的日期读入整个文件
+HEADER_READ_BUDGET = 256 * 1024
+# 网络存储模式下每次读取的块大小：多数文件的元数据一次往返即可读完
+NETWORK_READ_BLOCK = 64 * 1024
+
+# 拍摄日期缓存文件（与 settings.json 放在一起）及其大小上限
+METADATA_CACHE_FILE = "metadata_cache.db"
+DEFAULT_METADATA_CACHE_MB = 64
+
+EXIF_DATE_FORMATS = ("%Y:%m:%d %H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S")
+
+# TIFF/EXIF 标签
+TIFF_TAG_DATETIME = 0x0132
+TIFF_TAG_EXIF_IFD = 0x8769
+EXIF_TAG_DATETIME_ORIGINAL = 0x9003
+EXIF_TAG_SUBSEC_TIME_ORIGINAL = 0x9291
+TIFF_TAG_MAKE = 0x010F
+TIFF_TAG_MODEL = 0x0110
+
+TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8, 13: 4}
+
+# 支持的文件类型
+IMAGE_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.heic', '.heif',
+    '.tiff', '.tif', '.webp', '.raw', '.arw', '.cr2', '.nef',
+    '.dng', '.orf', '.sr2', '.rw2'
+})
+VIDEO_EXTENSIONS = frozenset({
+    '.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm',
+    '.m4v', '.3gp', '.mpg', '.mpeg', '.mts', '.m2ts'
+})
+SUPPORTED_EXTENSIONS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
+
+# 基于TIFF的RAW格式。CR2/NEF/ARW/DNG/SR2使用标准TIFF头（CR2在偏移8处另有"CR"标记），
+# ORF和RW2只是把TIFF头中的42换成了厂商自己的标识
+RAW_EXTENSIONS = {'.raw', '.arw', '.cr2', '.nef', '.dng', '.orf', '.sr2', '.rw2'}
+TIFF_MAGICS = {
+    42: "TIFF",
+    0x4F52: "Olympus ORF",     # "IIRO" / "MMOR"
+    0x5352: "Olympus ORF",     # "IIRS"
+    0x0055: "Panasonic RW2",   # "IIU\0"
+}
+TIFF_SIGNATURES = {b"II*\0", b"MM\0*", b"IIRO", b"IIRS", b"MMOR", b"IIU\0"}
+
+# 按媒体文件处理（尝试读取拍摄日期）的扩展名
+CAPTURE_DATE_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.heic', '.heif',
+    '.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm', '.m4v', '.3gp'
+}) | RAW_EXTENSIONS
+
+# ISOBMFF (MP4/MOV) 相关常量
+ISOBMFF_TOP_LEVEL_BOXES = {b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip", b"pnot"}
+MP4_EPOCH_OFFSET = 2082844800  # 1904-01-01 与 1970-01-01 之间的秒数
+QUICKTIME_CREATIONDATE_KEY = b"com.apple.quicktime.creationdate"
+QUICKTIME_CAMERA_KEYS = {b"com.apple.quicktime.make": "make", b"com.apple.quicktime.model": "model"}
+HEIF_BRANDS = {b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx", b"mif1", b"msf1", b"avif"}
+HEIF_EXTENSIONS = {'.heic', '.heif'}
+ISO_DATETIME_PATTERN = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?\s*(Z|[+-]\d{2}:?\d{2})?")
+
+
+class MetadataFormatError(Exception):
+    """内置解析器无法识别的文件格式"""
+
+
+class MetadataBudgetExceeded(Exception):
+    """解析元数据所需读取量超过了预算"""
+
+
+class HeaderReader:
+    """按偏移量小块读取文件，并统计读取量不超过预算。
+    block_size 大于0时（网络存储模式）每次用 os.pread 至少读取一整块并保留，落在块内的后续读取不再访问文件"""
+
+    def __init__(self, f, budget=HEADER_READ_BUDGET, block_size=0):
+        self.f = f
+        self.budget = budget
+        self.bytes_read = 0
+        self.block_size = block_size
+        self.block_offset = 0
+        self.block = b""
+        self.block_at_eof = False  # 块读到了文件末尾
+
+    def read_at(self, offset, size):
+        if offset < 0 or size < 0:
+            raise MetadataFormatError(f"无效的偏移量: {offset}")
+        if self.block_size:
+            return self.read_block(offset, size)
+        if self.bytes_read + size > self.budget:
+            raise MetadataBudgetExceeded(f"已读取 {self.bytes_read} 字节，超出预算 {self.budget}")
+        self.f.seek(offset)
+        data = self.f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def read_block(self, offset, size):
+        start = offset - self.block_offset
+        if 0 <= start and (start + size <= len(self.block) or (self.block_at_eof and start <= len(self.block))):
+            return self.block[start:start + size]
+        remaining = self.budget - self.bytes_read
+        if size > remaining:
+            raise MetadataBudgetExceeded(f"已读取 {self.bytes_read} 字节，超出预算 {self.budget}")
+        # 第一块覆盖文件头；之后的跳读（如文件末尾的moov）只读四分之一块，以免很快用完预算
+        block_size = self.block_size if not self.bytes_read else self.block_size // 4
+        length = min(max(size, block_size), remaining)
+        if hasattr(os, "pread"):
+            data = os.pread(self.f.fileno(), length, offset)
+        else:
+            # Windows 没有 os.pread
+            self.f.seek(offset)
+            data = self.f.read(length)
+        self.bytes_read += len(data)
+        self.block_offset, self.block, self.block_at_eof = offset, data, len(data) < length
+        return data[:size]
+
+    def read_exact(self, offset, size):
+        data = self.read_at(offset, size)
+        if len(data) != size:
+            raise MetadataFormatError("文件数据不完整")
+        return data
+
+    @property
+    def file_size(self):
+        return os.fstat(self.f.fileno()).st_size
+
+
+def parse_exif_datetime(value):
+    """解析EXIF风格的日期字符串，无法解析时返回None"""
+    if isinstance(value, bytes):
+        value = value.split(b"\0", 1)[0].decode("ascii", "ignore")
+    value = value.strip()
+    for fmt in EXIF_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_subsec(value):
+    """把小数秒的数字部分（如 "045"）转换为微秒"""
+    if isinstance(value, bytes):
+        value = value.split(b"\0", 1)[0].decode("ascii", "ignore")
+    digits = (value or "").strip()[:6]
+    return int(digits.ljust(6, "0")) if digits.isdigit() else 0
+
+
+def parse_ascii(value):
+    """解析EXIF ASCII字段（如相机厂商和型号），去掉结尾的空字符和空格"""
+    return value.split(b"\0", 1)[0].decode("utf-8", "ignore").strip()
+
+
+def parse_iso_datetime(value):
+    """解析ISO 8601日期；带时区偏移时保留拍摄地的本地时间，UTC时间转换为本机时间"""
+    if isinstance(value, bytes):
+        value = value.split(b"\0", 1)[0].decode("utf-8", "ignore")
+    match = ISO_DATETIME_PATTERN.match(value.strip())
+    if not match:
+        return parse_exif_datetime(value)
+    try:
+        date = datetime(*(int(part) for part in match.groups()[:6]), parse_subsec(match.group(7)))
+    except ValueError:
+        return None
+    if match.group(8) == "Z":
+        return date.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return date
+
+
+def read_ifd(reader, base, offset, endian):
+    """读取一个IFD，返回 {标签: (类型, 数量, 值字段)}"""
+    count = struct.unpack(endian + "H", reader.read_exact(base + offset, 2))[0]
+    if count > 1024:
+        raise MetadataFormatError(f"IFD条目数异常: {count}")
+    data = reader.read_exact(base + offset + 2, count * 12)
+    entries = {}
+    for i in range(count):
+        tag, typ, num = struct.unpack(endian + "HHI", data[i * 12:i * 12 + 8])
+        entries[tag] = (typ, num, data[i * 12 + 8:i * 12 + 12])
+    return entries
+
+
+def read_ifd_value(reader, base, endian, entry):
+    """读取IFD条目的原始值，4字节以内的值直接保存在条目中"""
+    typ, num, field = entry
+    size = TIFF_TYPE_SIZES.get(typ, 1) * num
+    if size <= 4:
+        return field[:size]
+    offset = struct.unpack(endian + "I", field)[0]
+    return reader.read_exact(base + offset, size)
+
+
+def read_ifd_long(endian, entry):
+    return struct.unpack(endian + "I", entry[2])[0]
+
+
+def read_tiff_date(reader, base=0, camera=None):
+    """从TIFF结构（包括基于TIFF的RAW）中读取日期，优先使用DateTimeOriginal；camera 不为None时同时写入相机厂商和型号"""
+    header = reader.read_exact(base, 8)
+    if header[:2] == b"II":
+        endian = "<"
+    elif header[:2] == b"MM":
+        endian = ">"
+    else:
+        raise MetadataFormatError("不是TIFF数据")
+    magic, ifd_offset = struct.unpack(endian + "HI", header[2:8])
+    if magic not in TIFF_MAGICS:
+        raise MetadataFormatError(f"未知的TIFF标识: {magic:#x}")
+
+    ifd0 = read_ifd(reader, base, ifd_offset, endian)
+    if camera is not None:
+        for tag, key in ((TIFF_TAG_MAKE, "make"), (TIFF_TAG_MODEL, "model")):
+            if tag in ifd0:
+                camera[key] = parse_ascii(read_ifd_value(reader, base, endian, ifd0[tag]))
+    exif_ifd = {}
+    if TIFF_TAG_EXIF_IFD in ifd0:
+        exif_ifd = read_ifd(reader, base, read_ifd_long(endian, ifd0[TIFF_TAG_EXIF_IFD]), endian)
+    # 部分DNG直接把DateTimeOriginal写在IFD0中
+    for ifd in (exif_ifd, ifd0):
+        if EXIF_TAG_DATETIME_ORIGINAL in ifd:
+            date = parse_exif_datetime(read_ifd_value(reader, base, endian, ifd[EXIF_TAG_DATETIME_ORIGINAL]))
+            if date:
+                if EXIF_TAG_SUBSEC_TIME_ORIGINAL in ifd:
+                    subsec = read_ifd_value(reader, base, endian, ifd[EXIF_TAG_SUBSEC_TIME_ORIGINAL])
+                    date = date.replace(microsecond=parse_subsec(subsec))
+                return date
+    if TIFF_TAG_DATETIME in ifd0:
+        return parse_exif_datetime(read_ifd_value(reader, base, endian, ifd0[TIFF_TAG_DATETIME]))
+    return None
+
+
+def read_jpeg_date(reader, camera=None):
+    """沿JPEG标记段查找APP1 Exif段，跳过其余段的内容"""
+    offset = 2
+    while True:
+        marker = reader.read_exact(offset, 4)
+        if marker[0] != 0xFF:
+            raise MetadataFormatError("JPEG标记段损坏")
+        code = marker[1]
+        if code == 0xFF:  # 填充字节
+            offset += 1
+            continue
+        if code in (0xD9, 0xDA):  # EOI / SOS，之后不会再有元数据
+            return None
+        if code == 0x01 or 0xD0 <= code <= 0xD7:  # 无长度的标记
+            offset += 2
+            continue
+        length = struct.unpack(">H", marker[2:4])[0]
+        if code == 0xE1 and length >= 8 and reader.read_exact(offset + 4, 6) == b"Exif\0\0":
+            return read_tiff_date(reader, offset + 10, camera)
+        offset += 2 + length
+
+
+def iter_boxes(reader, start, end):
+    """遍历 [start, end) 范围内的box，返回 (类型, 内容起始偏移, box结束偏移)，只读取box头"""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", reader.read_exact(offset, 8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", reader.read_exact(offset + 8, 8))[0]
+            header_size = 16
+        elif size == 0:  # 延伸到文件末尾
+            size = end - offset
+        if size < header_size:
+            raise MetadataFormatError(f"box大小异常: {box_type!r}")
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+
+def read_mvhd_date(reader, start):
+    """读取mvhd中的creation_time（UTC，自1904年起的秒数）"""
+    version = reader.read_exact(start, 1)[0]
+    if version == 1:
+        creation_time = struct.unpack(">Q", reader.read_exact(start + 4, 8))[0]
+    else:
+        creation_time = struct.unpack(">I", reader.read_exact(start + 4, 4))[0]
+    if creation_time <= MP4_EPOCH_OFFSET:
+        return None
+    try:
+        return datetime.fromtimestamp(creation_time - MP4_EPOCH_OFFSET)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def read_ilst_values(reader, start, end):
+    """读取ilst中每个条目的第一个data值，返回 {条目类型: 值}"""
+    values = {}
+    for item_type, item_start, item_end in iter_boxes(reader, start, end):
+        for box_type, data_start, data_end in iter_boxes(reader, item_start, item_end):
+            if box_type == b"data" and data_end - data_start > 8:
+                # data box: 4字节类型 + 4字节区域，之后是值
+                values[item_type] = reader.read_exact(data_start + 8, min(data_end - data_start - 8, 256))
+                break
+    return values
+
+
+def read_quicktime_meta_date(reader, start, end, camera=None):
+    """从meta/keys和meta/ilst中查找 com.apple.quicktime.creationdate 或 ©day"""
+    # QuickTime的meta直接包含子box，ISO的meta是带4字节版本和标志的full box
+    if reader.read_exact(start, 4) == b"\0\0\0\0":
+        start += 4
+    keys = {}
+    values = {}
+    for box_type, box_start, box_end in iter_boxes(reader, start, end):
+        if box_type == b"keys":
+            entry_count = struct.unpack(">I", reader.read_exact(box_start + 4, 4))[0]
+            offset = box_start + 8
+            for index in range(1, entry_count + 1):
+                if offset + 8 > box_end:
+                    break
+                key_size = struct.unpack(">I", reader.read_exact(offset, 4))[0]
+                if key_size < 8:
+                    break
+                keys[struct.pack(">I", index)] = reader.read_exact(offset + 8, key_size - 8)
+                offset += key_size
+        elif box_type == b"ilst":
+            values = read_ilst_values(reader, box_start, box_end)
+    if camera is not None:
+        for item_type, value in values.items():
+            if keys.get(item_type) in QUICKTIME_CAMERA_KEYS:
+                camera[QUICKTIME_CAMERA_KEYS[keys[item_type]]] = parse_ascii(value)
+    for item_type, value in values.items():
+        if keys.get(item_type) == QUICKTIME_CREATIONDATE_KEY:
+            date = parse_iso_datetime(value)
+            if date:
+                return date
+    if b"\xa9day" in values:
+        return parse_iso_datetime(values[b"\xa9day"])
+    return None
+
+
+def read_udta_date(reader, start, end, camera=None):
+    """读取udta中的QuickTime ©day文本（2字节长度 + 2字节语言 + 文本）"""
+    for box_type, box_start, box_end in iter_boxes(reader, start, end):
+        if box_type == b"\xa9day" and box_end - box_start > 4:
+            length = struct.unpack(">H", reader.read_exact(box_start, 2))[0]
+            length = min(length, box_end - box_start - 4, 256)
+            date = parse_iso_datetime(reader.read_exact(box_start + 4, length))
+            if date:
+                return date
+        elif box_type == b"meta":
+            date = read_quicktime_meta_date(reader, box_start, box_end, camera)
+            if date:
+                return date
+    return None
+
+
+def read_isobmff_date(reader, camera=None):
+    """遍历MP4/MOV的box查找创建日期，mdat等大box只根据其大小跳过"""
+    file_size = reader.file_size
+    for box_type, start, end in iter_boxes(reader, 0, file_size):
+        if box_type != b"moov":
+            continue
+        # 按可信度依次使用：Apple creationdate（含时区）、©day、mvhd（UTC）
+        mvhd_date = udta_date = None
+        for child_type, child_start, child_end in iter_boxes(reader, start, end):
+            if child_type == b"meta":
+                date = read_quicktime_meta_date(reader, child_start, child_end, camera)
+                if date:
+                    return date
+            elif child_type == b"udta":
+                udta_date = udta_date or read_udta_date(reader, child_start, child_end, camera)
+            elif child_type == b"mvhd":
+                mvhd_date = read_mvhd_date(reader, child_start)
+        return udta_date or mvhd_date
+    return None
+
+
+def read_ftyp_brands(reader, start, end):
+    """返回ftyp中的主品牌和兼容品牌集合"""
+    data = reader.read_exact(start, min(end - start, 256))
+    brands = {data[i:i + 4] for i in range(8, len(data) - 3, 4)}
+    brands.add(data[:4])
+    return data[:4], brands
+
+
+def is_heif_file(reader):
+    for box_type, start, end in iter_boxes(reader, 0, 8 + 256):
+        if box_type == b"ftyp":
+            major_brand, brands = read_ftyp_brands(reader, start, end)
+            return major_brand in HEIF_BRANDS or b"mif1" in brands
+        return False
+    return False
+
+
+def read_iinf_exif_ids(reader, start, end):
+    """从iinf中找出类型为Exif的项目ID"""
+    version = reader.read_exact(start, 1)[0]
+    offset = start + (6 if version == 0 else 8)
+    exif_ids = []
+    for box_type, infe_start, infe_end in iter_boxes(reader, offset, end):
+        if box_type != b"infe":
+            continue
+        infe = reader.read_exact(infe_start, min(infe_end - infe_start, 16))
+        if infe[0] == 2:
+            item_id, item_type = struct.unpack(">H", infe[4:6])[0], infe[8:12]
+        elif infe[0] == 3:
+            item_id, item_type = struct.unpack(">I", infe[4:8])[0], infe[10:14]
+        else:
+            continue
+        if item_type == b"Exif":
+            exif_ids.append(item_id)
+    return exif_ids
+
+
+def read_iloc(reader, start, end):
+    """解析iloc，返回 {项目ID: (构造方式, [(偏移, 长度), ...])}"""
+    data = reader.read_exact(start, end - start)
+    version = data[0]
+    offset_size, length_size = data[4] >> 4, data[4] & 0x0F
+    base_offset_size = data[5] >> 4
+    index_size = data[5] & 0x0F if version in (1, 2) else 0
+    pos = 6
+
+    def read_uint(size):
+        nonlocal pos
+        if pos + size > len(data):
+            raise MetadataFormatError("iloc数据不完整")
+        value = int.from_bytes(data[pos:pos + size], "big")
+        pos += size
+        return value
+
+    locations = {}
+    item_count = read_uint(2 if version < 2 else 4)
+    for _ in range(item_count):
+        item_id = read_uint(2 if version < 2 else 4)
+        construction_method = read_uint(2) & 0x0F if version in (1, 2) else 0
+        read_uint(2)  # data_reference_index
+        base_offset = read_uint(base_offset_size)
+        extents = []
+        for _ in range(read_uint(2)):
+            read_uint(index_size)
+            extent_offset = read_uint(offset_size)
+            extents.append((base_offset + extent_offset, read_uint(length_size)))
+        locations[item_id] = (construction_method, extents)
+    return locations
+
+
+def read_heif_date(reader, camera=None):
+    """通过meta/iinf/iloc定位Exif项目，只读取其中的TIFF结构，不解码图像"""
+    for box_type, start, end in iter_boxes(reader, 0, reader.file_size):
+        if box_type != b"meta":
+            continue
+        exif_ids = []
+        iloc_range = None
+        for child_type, child_start, child_end in iter_boxes(reader, start + 4, end):
+            if child_type == b"iinf":
+                exif_ids = read_iinf_exif_ids(reader, child_start, child_end)
+            elif child_type == b"iloc":
+                iloc_range = (child_start, child_end)
+        if not exif_ids:
+            return None
+        if iloc_range is None:
+            raise MetadataFormatError("HEIF文件缺少iloc")
+        locations = read_iloc(reader, *iloc_range)
+        for item_id in exif_ids:
+            construction_method, extents = locations.get(item_id, (None, []))
+            if construction_method != 0 or not extents:
+                raise MetadataFormatError("Exif项目不在文件偏移处")
+            offset = extents[0][0]
+            # Exif项目以4字节的TIFF头偏移开头
+            tiff_header_offset = struct.unpack(">I", reader.read_exact(offset, 4))[0]
+            date = read_tiff_date(reader, offset + 4 + tiff_header_offset, camera)
+            if date:
+                return date
+        return None
+    return None
+
+
+def read_exif_blob_date(blob, camera=None):
+    """从内存中的Exif数据块读取日期"""
+    if blob.startswith(b"Exif\0\0"):
+        blob = blob[6:]
+    elif blob[4:10] == b"Exif\0\0":
+        blob = blob[10:]
+    return read_tiff_date(HeaderReader(io.BytesIO(blob), len(blob)), camera=camera)
+
+
+def read_capture_date(file_path, budget=HEADER_READ_BUDGET, camera=None, block_size=0):
+    """只读取文件头部解析拍摄日期，格式无法识别时抛出 MetadataFormatError；camera 为字典时同时写入相机厂商和型号。
+    block_size 大于0时按块读取，适合每次访问都有较大延迟的网络存储"""
+    with open(file_path, "rb", buffering=0 if block_size else -1) as f:
+        if block_size and hasattr(os, "posix_fadvise"):
+            # 只读取零散的几块，告诉内核不要预读后面的图像或视频数据
+            try:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_RANDOM)
+            except OSError:
+                pass
+        reader = HeaderReader(f, budget, block_size)
+        head = reader.read_at(0, 8)
+        if head[:2] == b"\xff\xd8":
+            return read_jpeg_date(reader, camera)
+        if head[:4] in TIFF_SIGNATURES:
+            return read_tiff_date(reader, camera=camera)
+        if head[4:8] in ISOBMFF_TOP_LEVEL_BOXES:
+            if is_heif_file(reader):
+                return read_heif_date(reader, camera)
+            return read_isobmff_date(reader, camera)
+        raise MetadataFormatError("不支持的文件格式")
+
+
+def has_exif_signature(file_path):
+    """文件头是否为 JPEG SOI 或 TIFF 字节序标记，只有这两种 exif 库才能解析"""
+    with open(file_path, "rb") as f:
+        head = f.read(4)
+    return head[:2] == b"\xff\xd8" or head in TIFF_SIGNATURES
+
+
+def read_heif_library_date(file_path, camera=None):
+    """使用pillow_heif只读取HEIF元数据（不解码像素）"""
+    try:
+        from pillow_heif import open_heif  # 只有内置解析器失败时才需要，按需导入
+        exif_blob = open_heif(file_path).info.get("exif")
+        if exif_blob:
+            return read_exif_blob_date(exif_blob, camera)
+    except OSError:
+        raise  # 读取失败可能是暂时的，交给调用方处理，不当作没有拍摄日期
+    except Exception as e:
+        print(f"HEIF元数据读取错误: {str(e)}")
+    return None
+
+
+def read_exif_library_date(file_path, camera=None):
+    """使用exif库读取日期（需要读入整个文件）"""
+    try:
+        import exif  # 只有内置解析器失败时才需要，按需导入
+        with open(file_path, 'rb') as f:
+            exif_data = exif.Image(f)
+            if exif_data.has_exif:
+                if camera is not None:
+                    for field in ("make", "model"):
+                        if hasattr(exif_data, field):
+                            camera[field] = str(getattr(exif_data, field)).strip()
+                # 尝试不同的日期字段
+                for field in ['datetime_original', 'datetime']:
+                    if hasattr(exif_data, field):
+                        return parse_exif_datetime(getattr(exif_data, field))
+    except OSError:
+        raise  # 读取失败可能是暂时的，交给调用方处理，不当作没有拍摄日期
+    except Exception as e:
+        print(f"EXIF读取错误: {str(e)}")
+    return None
+
+
+class MetadataCache:
+    """以 (设备, inode, 大小, mtime_ns) 为键的拍摄日期和相机信息缓存，文件未变化时无需再次打开"""
+
+    # 累积多少条写入后提交一次
+    FLUSH_INTERVAL = 1000
+    # 表结构版本，不一致时丢弃旧缓存
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path=METADATA_CACHE_FILE, max_mb=DEFAULT_METADATA_CACHE_MB, readonly=False):
+        self.path = path
+        self.max_bytes = max_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        self.pending = []
+        self.touched = []
+        # 只读模式供工作进程使用：只查询，新结果和命中记录由 take_updates() 交给主进程写入
+        self.readonly = readonly
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS capture_dates")
+            self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS capture_dates (
+                dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,
+                date TEXT, make TEXT, model TEXT, used INTEGER,
+                PRIMARY KEY (dev, ino, size, mtime_ns)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS capture_dates_used ON capture_dates (used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(stat):
+        # 部分文件系统不提供inode，此时无法可靠地识别文件
+        if not stat.st_ino:
+            return None
+        return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def get(self, stat):
+        """返回 (是否命中, 日期, (厂商, 型号))，日期为None表示文件中没有拍摄日期"""
+        key = self.make_key(stat)
+        if key is None:
+            return False, None, None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT date, make, model FROM capture_dates WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+                key).fetchone()
+            if row is None:
+                return False, None, None
+            self.touched.append(key)
+        return True, datetime.fromisoformat(row[0]) if row[0] else None, (row[1], row[2])
+
+    def put(self, stat, date, camera=("", "")):
+        key = self.make_key(stat)
+        if key is None:
+            return
+        with self.lock:
+            self.pending.append(key + (date.isoformat() if date else None,) + tuple(camera))
+            if len(self.pending) >= self.FLUSH_INTERVAL and not self.readonly:
+                self.flush()
+
+    def take_updates(self):
+        """取出尚未写入的结果和命中记录（只读模式下由工作进程调用）"""
+        with self.lock:
+            updates = (self.pending, self.touched)
+            self.pending, self.touched = [], []
+        return updates
+
+    def merge_updates(self, updates):
+        """合并工作进程交回的结果和命中记录"""
+        pending, touched = updates
+        with self.lock:
+            self.pending.extend(pending)
+            self.touched.extend(touched)
+            if len(self.pending) >= self.FLUSH_INTERVAL:
+                self.flush()
+
+    def commit(self):
+        """写入累积的结果（长时间保持打开时，例如监视模式下每批之后调用）"""
+        with self.lock:
+            self.flush()
+
+    def flush(self):
+        """写入累积的结果（调用方需持有锁）"""
+        now = int(time.time())
+        if self.pending:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO capture_dates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [entry + (now,) for entry in self.pending])
+            self.pending = []
+        if self.touched:
+            self.conn.executemany(
+                "UPDATE capture_dates SET used=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+                [(now,) + key for key in self.touched])
+            self.touched = []
+        self.conn.commit()
+
+    def evict(self):
+        """超过大小上限时删除最久未使用的条目（调用方需持有锁）"""
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        used_bytes = (page_count - free_pages) * page_size
+        if used_bytes <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT COUNT(*) FROM capture_dates").fetchone()[0]
+        # 按平均条目大小估算，多删10%以免每次运行都触发淘汰
+        excess = int(rows * (1 - self.max_bytes / used_bytes * 0.9)) + 1
+        self.conn.execute(
+            "DELETE FROM capture_dates WHERE (dev, ino, size, mtime_ns) IN "
+            "(SELECT dev, ino, size, mtime_ns FROM capture_dates ORDER BY used LIMIT ?)", (excess,))
+        self.conn.commit()
+
+    def close(self):
+        if self.readonly:
+            self.conn.close()
+            return
+        with self.lock:
+            try:
+                self.flush()
+                self.evict()
+            finally:
+                self.conn.close()
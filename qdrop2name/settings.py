@@ -0,0 +1,57 @@
+"""settings.json 的读取，界面和命令行共用同一套默认值"""
+
+import json
+import os
+
+from .engine import (DEFAULT_METADATA_WORKERS, DEFAULT_NETWORK_QUEUE_DEPTH, DEFAULT_QUARANTINE_FOLDER,
+                     DEFAULT_ROTATIONAL_WORKERS)
+from .metadata import DEFAULT_METADATA_CACHE_MB, HEADER_READ_BUDGET
+
+SETTINGS_FILE = "settings.json"
+
+DEFAULT_SETTINGS = {
+    "date_source": "拍摄日期",
+    "fallback_date_source": "修改日期",
+    "duplicate_handling": "add_suffix",
+    "quarantine_folder": DEFAULT_QUARANTINE_FOLDER,
+    "name_template": "{YYYY}{MM}{DD}_{HH}{mm}{SS}",
+    "custom_format": "{YYYY}{MM}{DD}_{HH}{mm}{SS}",
+    "enable_non_media": True,
+    "non_media_date_source": "创建日期",
+    "header_read_budget": HEADER_READ_BUDGET,
+    "metadata_workers": DEFAULT_METADATA_WORKERS,
+    "metadata_backend": "auto",
+    "network_mode": "auto",
+    "network_queue_depth": DEFAULT_NETWORK_QUEUE_DEPTH,
+    "rotational_workers": DEFAULT_ROTATIONAL_WORKERS,
+    "metadata_cache": True,
+    "metadata_cache_mb": DEFAULT_METADATA_CACHE_MB
+}
+
+
+def load_settings(path=SETTINGS_FILE, create=True):
+    """读取设置，缺少的键使用默认值；文件不存在且 create 为真时写入默认配置"""
+    default_settings = dict(DEFAULT_SETTINGS)
+    try:
+        # 检查配置文件是否存在
+        if not os.path.exists(path):
+            if create:
+                # 如果不存在，创建默认配置文件
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(default_settings, f, ensure_ascii=False, indent=4)
+            return default_settings
+
+        # 读取现有配置
+        with open(path, "r", encoding="utf-8") as f:
+            settings = json.load(f)
+
+        # 检查必要的键是否存在，如果不存在则使用默认值
+        for key, value in default_settings.items():
+            if key not in settings:
+                settings[key] = value
+
+        return settings
+    except Exception as e:
+        print(f"加载设置错误: {str(e)}")
+        # 发生任何错误，返回默认设置
+        return default_settings
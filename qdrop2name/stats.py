@@ -0,0 +1,211 @@
+"""运行统计：按阶段累计次数、耗时和耗时分布，并记录最慢的文件及其各阶段耗时"""
+
+import json
+import threading
+import time
+import unicodedata
+from bisect import bisect_right
+
+# 阶段 -> 显示名称，按流程顺序排列
+STAGE_LABELS = {
+    "walk": "扫描目录",
+    "stat": "读取文件信息",
+    "cache": "查询日期缓存",
+    "metadata": "解析元数据",
+    "plan": "生成文件名",
+    "collision": "重名处理",
+    "duplicate": "比较文件内容",
+    "permission": "权限检查",
+    "journal": "写入日志",
+    "rename": "重命名",
+    "progress": "发送进度",
+    "ui": "界面更新",
+}
+# 耗时分布的区间上限（秒），按数量级划分
+BUCKET_BOUNDS = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+BUCKET_LABELS = ("<10µs", "<100µs", "<1ms", "<10ms", "<100ms", "<1s", "<10s", "≥10s")
+# 保留的最慢文件数
+SLOWEST_FILES = 20
+
+
+class StageStats:
+    """单个阶段的次数、总耗时、最大耗时和耗时分布"""
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKET_LABELS)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_right(BUCKET_BOUNDS, seconds)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 6),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "histogram": dict(zip(BUCKET_LABELS, self.buckets)),
+        }
+
+
+class RunStats:
+    """一次运行的统计，可在多个线程中同时记录。
+    每个文件的各阶段耗时只在提交时参与比较，只保留最慢的 SLOWEST_FILES 个，内存占用不随文件数增长"""
+
+    def __init__(self, slowest_count=SLOWEST_FILES):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.slowest = {}  # 文件路径 -> {阶段: 耗时}
+        self.slowest_count = slowest_count
+        self.threshold = 0.0  # 已满时最慢文件中的最短总耗时
+        self.devices = {}  # 设备名 -> [类型, 文件数, 最早开始时间, 最晚结束时间]
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    def record(self, stage, seconds, breakdown=None):
+        """记录一次耗时；breakdown 为单个文件的耗时明细时同时累加到其中"""
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats()
+            stats.add(seconds)
+        if breakdown is not None:
+            breakdown[stage] = breakdown.get(stage, 0.0) + seconds
+
+    def record_device(self, name, kind, started, finished):
+        """记录在某个设备上读取一个文件的起止时间，用于计算各设备的吞吐量"""
+        with self.lock:
+            device = self.devices.get(name)
+            if device is None:
+                self.devices[name] = [kind, 1, started, finished]
+            else:
+                device[1] += 1
+                device[2] = min(device[2], started)
+                device[3] = max(device[3], finished)
+
+    def record_file(self, file_path, breakdown):
+        """提交一个文件的耗时明细，同一文件多次提交（读取日期和重命名）时合并"""
+        if not breakdown:
+            return
+        total = sum(breakdown.values())
+        with self.lock:
+            existing = self.slowest.get(file_path)
+            if existing is not None:
+                for stage, seconds in breakdown.items():
+                    existing[stage] = existing.get(stage, 0.0) + seconds
+            elif len(self.slowest) < self.slowest_count:
+                self.slowest[file_path] = dict(breakdown)
+            elif total > self.threshold:
+                fastest = min(self.slowest, key=lambda path: sum(self.slowest[path].values()))
+                del self.slowest[fastest]
+                self.slowest[file_path] = dict(breakdown)
+            else:
+                return
+            if len(self.slowest) >= self.slowest_count:
+                self.threshold = min(sum(stages.values()) for stages in self.slowest.values())
+
+    def merge(self, other):
+        """合并另一份统计（例如扫描阶段的统计）"""
+        self.merge_snapshot(other.snapshot())
+
+    def snapshot(self):
+        """可在进程间传递的统计数据 (各阶段统计, 最慢文件)"""
+        with self.lock:
+            return (dict(self.stages), [(path, dict(breakdown)) for path, breakdown in self.slowest.items()],
+                    {name: list(device) for name, device in self.devices.items()})
+
+    def merge_snapshot(self, snapshot):
+        stages, slowest, devices = snapshot
+        with self.lock:
+            for stage, stats in stages.items():
+                self.stages.setdefault(stage, StageStats()).merge(stats)
+            for name, (kind, count, started, finished) in devices.items():
+                device = self.devices.setdefault(name, [kind, 0, started, finished])
+                device[1] += count
+                device[2] = min(device[2], started)
+                device[3] = max(device[3], finished)
+        for path, breakdown in slowest:
+            self.record_file(path, breakdown)
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def slowest_files(self):
+        with self.lock:
+            items = [(path, dict(breakdown)) for path, breakdown in self.slowest.items()]
+        items.sort(key=lambda item: sum(item[1].values()), reverse=True)
+        return items
+
+    def to_dict(self):
+        with self.lock:
+            stages = {stage: stats.to_dict() for stage, stats in self.ordered_stages()}
+            devices = {}
+            for name, (kind, count, started, finished) in self.devices.items():
+                seconds = finished - started
+                devices[name] = {"kind": kind, "files": count, "seconds": round(seconds, 6),
+                                 "files_per_sec": round(count / seconds, 1) if seconds > 0 else None}
+        return {
+            "elapsed_seconds": round(self.elapsed if self.elapsed is not None
+                                     else time.perf_counter() - self.started, 6),
+            "stages": stages,
+            "devices": devices,
+            "slowest_files": [
+                {"path": path, "total_ms": round(sum(breakdown.values()) * 1000, 3),
+                 "stages": {stage: round(seconds * 1000, 3) for stage, seconds in breakdown.items()}}
+                for path, breakdown in self.slowest_files()
+            ],
+        }
+
+    def ordered_stages(self):
+        order = list(STAGE_LABELS)
+        return sorted(self.stages.items(),
+                      key=lambda item: order.index(item[0]) if item[0] in order else len(order))
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def format_text(self):
+        """生成纯文本报告，供统计窗口和命令行显示"""
+        data = self.to_dict()
+        lines = [f"总耗时: {data['elapsed_seconds']:.3f} 秒", ""]
+        lines.append(pad("阶段", 14) + pad("次数", 9, True) + pad("总耗时(s)", 12, True) + pad("平均(ms)", 11, True)
+                     + pad("最大(ms)", 11, True) + "  耗时分布")
+        for stage, stats in data["stages"].items():
+            histogram = " ".join(f"{label}:{count}" for label, count in stats["histogram"].items() if count)
+            lines.append(f"{pad(STAGE_LABELS.get(stage, stage), 14)}{stats['count']:>9}{stats['total_seconds']:>12.3f}"
+                         f"{stats['mean_ms']:>11.3f}{stats['max_ms']:>11.3f}  {histogram}")
+        if data["devices"]:
+            lines += ["", "各设备读取日期的吞吐量:"]
+            for name, device in data["devices"].items():
+                speed = f"{device['files_per_sec']} 个/秒" if device["files_per_sec"] else "-"
+                lines.append(f"  {name} ({device['kind']}): {device['files']} 个文件, "
+                             f"{device['seconds']:.3f} 秒, {speed}")
+        if data["slowest_files"]:
+            lines += ["", f"最慢的 {len(data['slowest_files'])} 个文件:"]
+            for item in data["slowest_files"]:
+                breakdown = ", ".join(f"{STAGE_LABELS.get(stage, stage)} {ms:.1f}ms"
+                                      for stage, ms in item["stages"].items())
+                lines.append(f"{item['total_ms']:>10.1f}ms  {item['path']}")
+                lines.append(f"{'':>12}{breakdown}")
+        return "\n".join(lines)
+
+
+def pad(text, width, right=False):
+    """按显示宽度（中文占两格）补空格，使表格在等宽字体中对齐，right 为True时右对齐"""
+    used = sum(2 if unicodedata.east_asian_width(char) in "WF" else 1 for char in text)
+    spaces = " " * max(width - used, 0)
+    return spaces + text if right else text + spaces
@@ -0,0 +1,102 @@
+"""存储设备相关的判断：文件是否位于网络挂载（SMB/NFS 等）上，以及本地设备是否为机械硬盘"""
+
+import os
+import re
+import sys
+
+# Linux /proc/self/mounts 中的网络文件系统类型
+NETWORK_FILESYSTEMS = frozenset({
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs", "afs", "9p", "ceph", "glusterfs", "lustre",
+    "davfs", "fuse.sshfs", "fuse.rclone", "fuse.davfs2", "fuse.glusterfs",
+})
+# 设备类型：固态或无法判断、机械硬盘、网络存储
+DEVICE_SSD = "ssd"
+DEVICE_HDD = "hdd"
+DEVICE_NETWORK = "network"
+
+# GetDriveTypeW 返回值：网络驱动器
+DRIVE_REMOTE = 4
+# 挂载表中空格等字符写作 \040 这样的八进制转义
+MOUNT_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+def read_mounts():
+    """读取 Linux 挂载表，返回按挂载点长度从长到短排列的 [(挂载点, 文件系统类型)]"""
+    mounts = []
+    try:
+        with open("/proc/self/mounts", "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3:
+                    mount_point = MOUNT_ESCAPE.sub(lambda match: chr(int(match.group(1), 8)), fields[1])
+                    mounts.append((mount_point, fields[2]))
+    except OSError:
+        return []
+    mounts.sort(key=lambda item: len(item[0]), reverse=True)
+    return mounts
+
+
+class NetworkPathDetector:
+    """判断路径是否位于网络存储上，每个挂载点或盘符只查询一次"""
+
+    def __init__(self):
+        self.mounts = read_mounts() if sys.platform.startswith("linux") else []
+        self.drives = {}
+
+    def is_network_path(self, path):
+        path = os.path.abspath(path)
+        if sys.platform == "win32":
+            # UNC 路径（\\server\share）一定是网络路径，盘符按驱动器类型判断
+            if path.startswith("\\\\"):
+                return True
+            drive = os.path.splitdrive(path)[0].upper()
+            if drive not in self.drives:
+                try:
+                    import ctypes
+                    self.drives[drive] = ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
+                except (AttributeError, OSError):
+                    self.drives[drive] = False
+            return self.drives[drive]
+        for mount_point, fs_type in self.mounts:
+            if path == mount_point or path.startswith(mount_point.rstrip("/") + "/"):
+                return fs_type in NETWORK_FILESYSTEMS
+        # 其他系统无法可靠判断，需要在设置中手动开启
+        return False
+
+    def any_network_path(self, paths):
+        """只要有一个文件所在目录位于网络存储上就返回True"""
+        checked = set()
+        for path in paths:
+            dir_path = os.path.dirname(path)
+            if dir_path in checked:
+                continue
+            checked.add(dir_path)
+            if self.is_network_path(dir_path):
+                return True
+        return False
+
+
+def is_rotational_device(st_dev):
+    """Linux 上通过 /sys/dev/block 判断设备是否为机械硬盘，无法判断时返回None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    block = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+    # 分区没有 queue 目录，使用所在磁盘的设置
+    for path in (block, os.path.dirname(block)):
+        try:
+            with open(os.path.join(path, "queue", "rotational"), "r") as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def device_name(st_dev, path):
+    """用于统计显示的设备名称：Linux 上为块设备名，Windows 上为盘符或共享路径"""
+    if sys.platform == "win32":
+        return os.path.splitdrive(os.path.abspath(path))[0] or str(st_dev)
+    if sys.platform.startswith("linux"):
+        block = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+        if os.path.exists(block):
+            return os.path.basename(block)
+    return f"{os.major(st_dev)}:{os.minor(st_dev)}"
@@ -0,0 +1,96 @@
+"""命名模板：每次运行只解析一次，编译为格式字符串，每个文件只需一次格式化"""
+
+import os
+import re
+
+# 模板变量 -> (编译后的格式字段, 说明)
+TEMPLATE_TOKENS = {
+    "YYYY": ("{date.year:04d}", "年份（如：2025）"),
+    "MM": ("{date.month:02d}", "月份（如：04）"),
+    "DD": ("{date.day:02d}", "日期（如：15）"),
+    "HH": ("{date.hour:02d}", "小时（如：12）"),
+    "mm": ("{date.minute:02d}", "分钟（如：28）"),
+    "SS": ("{date.second:02d}", "秒钟（如：09）"),
+    "ms": ("{ms:03d}", "毫秒（如：045，来自EXIF的SubSecTimeOriginal）"),
+    "SEQ": ("{seq:0{width}d}", "本批次序号，默认3位，{SEQ:5} 表示5位"),
+    "NAME": ("{name}", "原文件名（不含扩展名）"),
+    "FOLDER": ("{folder}", "所在文件夹名"),
+    "MAKE": ("{make}", "相机厂商"),
+    "MODEL": ("{model}", "相机型号"),
+}
+DEFAULT_SEQ_WIDTH = 3
+
+TOKEN_PATTERN = re.compile(r"\{([A-Za-z]+)(?::(\d{1,2}))?\}")
+# Windows 文件名中不允许的字符
+INVALID_NAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+class TemplateError(ValueError):
+    """命名模板无效"""
+
+
+class NameTemplate:
+    """编译后的命名模板，format() 根据日期和文件信息生成基础文件名（不含扩展名和重名序号）"""
+
+    def __init__(self, template):
+        self.template = template
+        self.pattern, self.fields = self.compile(template)
+        # 只计算模板中用到的字段
+        self.uses_ms = "ms" in self.fields
+        self.uses_seq = "SEQ" in self.fields
+        self.uses_name = "NAME" in self.fields
+        self.uses_folder = "FOLDER" in self.fields
+        self.uses_camera = "MAKE" in self.fields or "MODEL" in self.fields
+
+    @staticmethod
+    def compile(template):
+        """校验模板并转换为 str.format 格式字符串，返回 (格式字符串, 用到的变量)"""
+        if not template or not template.strip():
+            raise TemplateError("命名模板不能为空")
+        parts = []
+        fields = set()
+        position = 0
+        for match in TOKEN_PATTERN.finditer(template):
+            parts.append(NameTemplate.compile_literal(template[position:match.start()]))
+            token, width = match.group(1), match.group(2)
+            if token not in TEMPLATE_TOKENS:
+                raise TemplateError(f"未知的模板变量: {{{token}}}")
+            if width is not None and token != "SEQ":
+                raise TemplateError(f"只有 {{SEQ}} 可以指定位数: {match.group(0)}")
+            field = TEMPLATE_TOKENS[token][0]
+            if token == "SEQ":
+                field = field.replace("{width}", str(int(width) if width else DEFAULT_SEQ_WIDTH))
+            parts.append(field)
+            fields.add(token)
+            position = match.end()
+        parts.append(NameTemplate.compile_literal(template[position:]))
+        return "".join(parts), fields
+
+    @staticmethod
+    def compile_literal(text):
+        if "{" in text or "}" in text:
+            raise TemplateError(f"花括号不匹配或变量格式错误: {text}")
+        if INVALID_NAME_CHARS.search(text):
+            raise TemplateError(f"模板包含文件名中不允许的字符: {text}")
+        return text
+
+    def format(self, date, file_path="", seq=0, camera=None):
+        values = {"date": date}
+        if self.uses_ms:
+            values["ms"] = date.microsecond // 1000
+        if self.uses_seq:
+            values["seq"] = seq
+        if self.uses_name:
+            values["name"] = os.path.splitext(os.path.basename(file_path))[0]
+        if self.uses_folder:
+            values["folder"] = os.path.basename(os.path.dirname(file_path))
+        if self.uses_camera:
+            make, model = camera or ("", "")
+            values["make"] = INVALID_NAME_CHARS.sub("_", make)
+            values["model"] = INVALID_NAME_CHARS.sub("_", model)
+        return self.pattern.format_map(values)
+
+
+def template_help():
+    """生成模板变量说明（界面提示和命令行帮助共用）"""
+    return "\n".join(f"{{{token}}} - {description}" for token, (field, description) in TEMPLATE_TOKENS.items())
@@ -0,0 +1,284 @@
+"""监视文件夹：新文件写入完成后分批交给重命名引擎。
+Linux 上使用 inotify 只处理有变化的文件，其他系统定期扫描被监视的目录"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from .engine import DirectoryNameIndex, iter_supported_files, open_metadata_cache
+from .metadata import SUPPORTED_EXTENSIONS
+
+# 最后一次变化后至少等待多久才处理，连续写入的一批文件合并为一次重命名（秒）
+DEFAULT_DEBOUNCE = 2.0
+# 没有 inotify 时扫描目录的间隔（秒）
+POLL_INTERVAL = 2.0
+
+# inotify 事件（见 inotify(7)）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_watched_file(name, include_all):
+    # 重命名过程中的临时文件和隐藏文件（多为同步工具尚未写完的文件）不处理
+    if name.startswith(".") or name.endswith(".qdrop2name-tmp"):
+        return False
+    return include_all or os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+class InotifyWatcher:
+    """基于 inotify 的监视器，递归监视子目录，只报告发生变化的文件"""
+
+    def __init__(self, paths, include_all=False):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.libc = libc
+        self.include_all = include_all
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self.directories = {}  # 监视描述符 -> 目录
+        self.roots = list(paths)
+        self.pending_found = []
+        for path in self.roots:
+            self.add_tree(path, report_files=False)
+
+    def add_tree(self, root, report_files=True):
+        """监视目录及其子目录；目录是在监视开始后创建的时，其中已有的文件也要报告"""
+        stack = [root]
+        while stack:
+            dir_path = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+            if wd < 0:
+                print(f"无法监视目录: {dir_path} ({os.strerror(ctypes.get_errno())})")
+                continue
+            self.directories[wd] = dir_path
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif report_files and is_watched_file(entry.name, self.include_all):
+                            self.pending_found.append(entry.path)
+            except OSError as e:
+                print(f"目录扫描错误: {str(e)}")
+
+    def read_events(self, timeout):
+        """等待最多 timeout 秒，返回 (有变化的文件, 被删除或移走的文件)"""
+        changed, removed = self.pending_found, []
+        self.pending_found = []
+        if changed:
+            timeout = 0
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed, removed
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return changed, removed
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].split(b"\0", 1)[0]
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出，丢失的事件只能靠重新扫描补回
+                print("监视事件过多，重新扫描被监视的目录")
+                for root in self.roots:
+                    changed.extend(iter_supported_files([root], self.include_all))
+                continue
+            dir_path = self.directories.get(wd)
+            if dir_path is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF):
+                self.directories.pop(wd, None)
+                continue
+            path = os.path.join(dir_path, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                continue
+            if not is_watched_file(os.path.basename(path), self.include_all):
+                continue
+            if mask & (IN_MOVED_FROM | IN_DELETE):
+                removed.append(path)
+            else:
+                changed.append(path)
+        changed.extend(self.pending_found)
+        self.pending_found = []
+        return changed, removed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """没有 inotify 时的监视器：定期扫描目录，按大小和修改时间找出有变化的文件"""
+
+    def __init__(self, paths, include_all=False, interval=POLL_INTERVAL):
+        self.roots = list(paths)
+        self.include_all = include_all
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        stack = list(self.roots)
+        while stack:
+            dir_path = stack.pop()
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file() and is_watched_file(entry.name, self.include_all):
+                                stat = entry.stat()
+                                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"目录扫描错误: {str(e)}")
+        return snapshot
+
+    def read_events(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self.scan()
+        changed = [path for path, state in snapshot.items() if self.snapshot.get(path) != state]
+        removed = [path for path in self.snapshot if path not in snapshot]
+        self.snapshot = snapshot
+        return changed, removed
+
+    def close(self):
+        pass
+
+
+def create_watcher(paths, include_all=False):
+    """Linux 上优先使用 inotify，不可用时退回定期扫描"""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths, include_all)
+        except (OSError, AttributeError) as e:
+            print(f"inotify 不可用，改为定期扫描: {str(e)}")
+    return PollingWatcher(paths, include_all)
+
+
+class StableFileTracker:
+    """记录有变化的文件，在一段时间内没有新变化且两次检查的大小和修改时间相同后才视为写入完成"""
+
+    def __init__(self, debounce=DEFAULT_DEBOUNCE):
+        self.debounce = debounce
+        self.files = {}  # 文件路径 -> [最后一次变化的时间, 上次检查时的 (大小, 修改时间)]
+
+    def touch(self, path, now):
+        entry = self.files.get(path)
+        if entry is None:
+            self.files[path] = [now, None]
+        else:
+            entry[0] = now
+
+    def discard(self, path):
+        self.files.pop(path, None)
+
+    def take_ready(self, now):
+        """返回写入已完成的文件，并停止跟踪它们"""
+        ready = []
+        for path, entry in list(self.files.items()):
+            if now - entry[0] < self.debounce:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.files[path]  # 文件已被移走
+                continue
+            state = (stat.st_size, stat.st_mtime_ns)
+            if state == entry[1]:
+                ready.append(path)
+                del self.files[path]
+            else:
+                # 大小仍在变化（或第一次检查），再等一个周期
+                entry[0], entry[1] = now, state
+        return ready
+
+    def next_deadline(self):
+        return min((entry[0] + self.debounce for entry in self.files.values()), default=None)
+
+    def __len__(self):
+        return len(self.files)
+
+
+class WatchSession:
+    """监视若干文件夹，把写入完成的新文件分批交给 on_batch 处理。
+    日期缓存和目录文件名索引在各批之间保留，索引根据文件事件增量更新，不必重新扫描目录"""
+
+    def __init__(self, paths, settings, debounce=DEFAULT_DEBOUNCE, include_existing=False):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.settings = settings
+        self.include_all = settings.get("enable_non_media", False)
+        self.tracker = StableFileTracker(debounce)
+        self.name_index = DirectoryNameIndex()
+        self.metadata_cache = open_metadata_cache(settings)
+        self.include_existing = include_existing
+        self.lock = threading.Lock()
+        self.own_paths = set()  # 本程序重命名得到的文件，对应的事件不再处理
+
+    def ignore(self, paths):
+        """登记本程序重命名得到的文件（可在其他线程中调用）"""
+        with self.lock:
+            self.own_paths.update(paths)
+
+    def run(self, on_batch, is_cancelled=lambda: False):
+        """监视直到 is_cancelled() 为真；on_batch(文件列表) 在本线程中调用，处理完才继续监视"""
+        watcher = create_watcher(self.paths, self.include_all)
+        try:
+            if self.include_existing:
+                # 调用方明确要求时，开始监视前已经在文件夹中的文件也处理一次
+                now = time.monotonic()
+                for path in iter_supported_files(self.paths, self.include_all, is_cancelled):
+                    self.tracker.touch(path, now)
+            while not is_cancelled():
+                deadline = self.tracker.next_deadline()
+                timeout = 0.5 if deadline is None else min(max(deadline - time.monotonic(), 0.05), 0.5)
+                changed, removed = watcher.read_events(timeout)
+                now = time.monotonic()
+                with self.lock:
+                    own_paths, self.own_paths = self.own_paths, set()
+                for path in removed:
+                    self.tracker.discard(path)
+                    self.name_index.release(os.path.dirname(path), os.path.basename(path))
+                for path in changed:
+                    self.name_index.claim(os.path.dirname(path), os.path.basename(path))
+                    if path in own_paths:
+                        own_paths.discard(path)
+                        continue
+                    self.tracker.touch(path, now)
+                with self.lock:
+                    # 事件尚未到达的留到下一轮
+                    self.own_paths |= own_paths
+                ready = self.tracker.take_ready(now)
+                if ready and not is_cancelled():
+                    on_batch(sorted(ready))
+                    if self.metadata_cache is not None:
+                        self.metadata_cache.commit()
+        finally:
+            watcher.close()
+
+    def close(self):
+        if self.metadata_cache is not None:
+            self.metadata_cache.close()
+            self.metadata_cache = None